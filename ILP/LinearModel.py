@@ -0,0 +1,97 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+class LinearModel:
+    """ A mixed integer linear model independent from the solver, that optimizes objective @ x
+        subject to constraints @ x (<=, = or >=) rhs and lower_bounds <= x <= upper_bounds.
+        Variables and constraints are grouped in named blocks """
+
+    def __init__(self, maximize: bool = True) -> None:
+        self.maximize: bool = maximize
+        self.num_variables: int = 0
+        self.variable_blocks: {str: slice} = {}
+        self.lower_bounds: [np.ndarray] = []
+        self.upper_bounds: [np.ndarray] = []
+        self.integrality: [np.ndarray] = []
+        self.objectives: [np.ndarray] = []
+        self.constraint_blocks: {str: slice} = {}
+        self.constraint_rows: [sp.csr_matrix] = []
+        self.senses: [np.ndarray] = []
+        self.rhs: [np.ndarray] = []
+        self.num_constraints: int = 0
+
+    def add_variables(self, name: str, count: int, lower_bounds=0, upper_bounds=1, integer: bool = True,
+                      objective=0) -> slice:
+        """
+        Adds a block of variables to the model
+
+        :param name: the name of the block
+        :param count: the number of variables
+        :param lower_bounds: lower bound of each variable, or of all of them
+        :param upper_bounds: upper bound of each variable, or of all of them
+        :param integer: True if the variables are integer, False if they are continuous
+        :param objective: coefficient of each variable in the objective function, or of all of them
+        :return: the positions of the variables in the model
+        """
+        block = slice(self.num_variables, self.num_variables + count)
+        self.variable_blocks[name] = block
+        self.lower_bounds.append(np.broadcast_to(np.asarray(lower_bounds, dtype=np.float64), (count,)))
+        self.upper_bounds.append(np.broadcast_to(np.asarray(upper_bounds, dtype=np.float64), (count,)))
+        self.integrality.append(np.full(count, integer))
+        self.objectives.append(np.broadcast_to(np.asarray(objective, dtype=np.float64), (count,)))
+        self.num_variables += count
+        return block
+
+    def add_constraints(self, name: str, coefficients: {str: sp.spmatrix}, sense: str, rhs) -> slice:
+        """
+        Adds a block of constraints to the model, after all its variables have been added
+
+        :param name: the name of the block
+        :param coefficients: the coefficients matrix of each block of variables involved in the constraints,
+                             all the matrices must have the same number of rows
+        :param sense: '<' for <= constraints, '=' for equalities and '>' for >= constraints
+        :param rhs: right hand side of each constraint, or of all of them
+        :return: the positions of the constraints in the model
+        """
+        count = next(iter(coefficients.values())).shape[0]
+        columns = [coefficients[block_name] if block_name in coefficients
+                   else sp.csr_matrix((count, block.stop - block.start))
+                   for block_name, block in self.variable_blocks.items()]
+        block = slice(self.num_constraints, self.num_constraints + count)
+        self.constraint_blocks[name] = block
+        self.constraint_rows.append(sp.hstack(columns, format='csr'))
+        self.senses.append(np.full(count, sense))
+        self.rhs.append(np.broadcast_to(np.asarray(rhs, dtype=np.float64), (count,)))
+        self.num_constraints += count
+        return block
+
+    def get_objective(self) -> np.ndarray:
+        """ Returns the coefficients of all the variables in the objective function """
+        return np.concatenate(self.objectives) if self.objectives else np.zeros(0)
+
+    def get_bounds(self) -> (np.ndarray, np.ndarray):
+        """ Returns the lower and upper bounds of all the variables """
+        if not self.lower_bounds:
+            return np.zeros(0), np.zeros(0)
+        return np.concatenate(self.lower_bounds), np.concatenate(self.upper_bounds)
+
+    def get_integrality(self) -> np.ndarray:
+        """ Returns True for each integer variable, False for each continuous one """
+        return np.concatenate(self.integrality) if self.integrality else np.zeros(0, dtype=bool)
+
+    def get_constraints(self) -> (sp.csr_matrix, np.ndarray, np.ndarray):
+        """ Returns the coefficients matrix, the senses and the right hand sides of all the constraints """
+        if not self.constraint_rows:
+            return sp.csr_matrix((0, self.num_variables)), np.zeros(0, dtype='<U1'), np.zeros(0)
+        return (sp.vstack(self.constraint_rows, format='csr'), np.concatenate(self.senses),
+                np.concatenate(self.rhs))
+
+    def get_variable_names(self) -> [str]:
+        """ Returns the name of each variable, made of the name of its block and its index in the block """
+        return [f'{name}[{index}]' for name, block in self.variable_blocks.items()
+                for index in range(block.stop - block.start)]
+
+    def get_values(self, values: np.ndarray, name: str) -> np.ndarray:
+        """ Returns the values of the variables of the given block, from the values of all the variables """
+        return values[self.variable_blocks[name]]
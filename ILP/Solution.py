@@ -0,0 +1,44 @@
+import numpy as np
+
+OPTIMAL = 'optimal'
+TIME_LIMIT = 'time_limit'
+INFEASIBLE = 'infeasible'
+UNBOUNDED = 'unbounded'
+OTHER = 'other'
+
+
+class Solution:
+    """ The result of solving a LinearModel with a solver backend """
+
+    def __init__(self, status: str, objective: float = None, values: np.ndarray = None, runtime: float = 0,
+                 bound: float = None) -> None:
+        """
+        :param status: one of OPTIMAL, TIME_LIMIT, INFEASIBLE, UNBOUNDED or OTHER
+        :param objective: the value of the objective function, None if no solution was found
+        :param values: the values of all the variables, None if no solution was found
+        :param runtime: the seconds spent by the solver
+        :param bound: the best bound on the objective function proved by the solver, if known
+        """
+        self.status: str = status
+        self.objective: float = objective
+        self.values: np.ndarray = values
+        self.runtime: float = runtime
+        self.bound: float = bound
+
+    def is_optimal(self) -> bool:
+        """ Returns True if the solution is proved to be optimal """
+        return self.status == OPTIMAL
+
+    def has_values(self) -> bool:
+        """ Returns True if the solver found a feasible solution """
+        return self.values is not None
+
+    def to_json(self, variable_names: [str]) -> dict:
+        """ Returns the solution in a JSON serializable format, listing only the variables different from zero """
+        variables = []
+        if self.has_values():
+            variables = [{'VarName': variable_names[index], 'X': float(self.values[index])}
+                         for index in np.flatnonzero(np.abs(self.values) > 1e-6)]
+        return {'SolutionInfo': {'Status': self.status, 'Runtime': self.runtime,
+                                 'ObjVal': self.objective, 'ObjBound': self.bound},
+                'Vars': variables}
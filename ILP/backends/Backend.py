@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+
+from ILP.LinearModel import LinearModel
+from ILP.Solution import Solution
+
+
+class Backend(ABC):
+    """ A solver able to optimize a LinearModel """
+
+    name: str = ''
+
+    @abstractmethod
+    def solve(self, model: LinearModel, time_limit: float = None, verbose: bool = True) -> Solution:
+        """
+        Optimizes the model
+
+        :param model: the model to optimize
+        :param time_limit: maximum seconds given to the solver, None for no limit
+        :param verbose: if True the solver prints its log
+        :return: the solution found
+        """
+        pass
@@ -0,0 +1,44 @@
+import numpy as np
+
+from ILP.LinearModel import LinearModel
+from ILP.Solution import Solution, OPTIMAL, TIME_LIMIT, INFEASIBLE, UNBOUNDED, OTHER
+from .Backend import Backend
+
+
+class GurobiBackend(Backend):
+    """ Solves the models with Gurobi, which requires a license """
+
+    name = 'gurobi'
+
+    def solve(self, model: LinearModel, time_limit: float = None, verbose: bool = True) -> Solution:
+        # imported here, so that the other backends can be used without Gurobi installed
+        import gurobipy as gp
+        from gurobipy import GRB
+
+        gurobi_model = gp.Model()
+        gurobi_model.setParam(GRB.Param.OutputFlag, int(verbose))
+        if time_limit is not None:
+            gurobi_model.setParam(GRB.Param.TimeLimit, time_limit)
+
+        lower_bounds, upper_bounds = model.get_bounds()
+        binary = (lower_bounds >= 0) & (upper_bounds <= 1)
+        types = np.where(model.get_integrality(), np.where(binary, GRB.BINARY, GRB.INTEGER), GRB.CONTINUOUS)
+        variables = gurobi_model.addMVar(model.num_variables, lb=lower_bounds, ub=upper_bounds, vtype=types,
+                                         name='x')
+        constraints, senses, rhs = model.get_constraints()
+        gurobi_model.addMConstr(constraints, variables, senses, rhs)
+        gurobi_model.setObjective(model.get_objective() @ variables,
+                                  GRB.MAXIMIZE if model.maximize else GRB.MINIMIZE)
+
+        gurobi_model.optimize()
+        if gurobi_model.Status == GRB.INF_OR_UNBD:
+            # Turn pre-solve off to determine whether model is infeasible or unbounded
+            gurobi_model.setParam(GRB.Param.Presolve, 0)
+            gurobi_model.optimize()
+
+        status = {GRB.OPTIMAL: OPTIMAL, GRB.TIME_LIMIT: TIME_LIMIT, GRB.INFEASIBLE: INFEASIBLE,
+                  GRB.UNBOUNDED: UNBOUNDED}.get(gurobi_model.Status, OTHER)
+        if gurobi_model.SolCount == 0:
+            return Solution(status, runtime=gurobi_model.Runtime)
+        return Solution(status, gurobi_model.ObjVal, np.array(variables.X), gurobi_model.Runtime,
+                        gurobi_model.ObjBound)
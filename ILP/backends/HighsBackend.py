@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from ILP.LinearModel import LinearModel
+from ILP.Solution import Solution, OPTIMAL, TIME_LIMIT, INFEASIBLE, UNBOUNDED, OTHER
+from .Backend import Backend
+
+
+class HighsBackend(Backend):
+    """ Solves the models with the open-source HiGHS solver bundled with SciPy """
+
+    name = 'highs'
+
+    def solve(self, model: LinearModel, time_limit: float = None, verbose: bool = True) -> Solution:
+        constraints, senses, rhs = model.get_constraints()
+        # HiGHS takes each constraint as lower <= row <= upper
+        lower_rhs = np.where(senses == '<', -np.inf, rhs)
+        upper_rhs = np.where(senses == '>', np.inf, rhs)
+        linear_constraints = [LinearConstraint(constraints, lower_rhs, upper_rhs)] if model.num_constraints else []
+
+        # HiGHS only minimizes
+        sign = -1 if model.maximize else 1
+        options = {'disp': verbose}
+        if time_limit is not None:
+            options['time_limit'] = time_limit
+
+        start = time.time()
+        result = milp(sign * model.get_objective(), constraints=linear_constraints, bounds=Bounds(*model.get_bounds()),
+                      integrality=model.get_integrality().astype(np.uint8), options=options)
+        runtime = time.time() - start
+
+        status = {0: OPTIMAL, 1: TIME_LIMIT, 2: INFEASIBLE, 3: UNBOUNDED}.get(result.status, OTHER)
+        if result.x is None:
+            return Solution(status, runtime=runtime)
+        bound = getattr(result, 'mip_dual_bound', None)
+        return Solution(status, sign * result.fun, result.x, runtime, None if bound is None else sign * bound)
@@ -0,0 +1,4 @@
+from .Backend import Backend
+from .GurobiBackend import GurobiBackend
+from .HighsBackend import HighsBackend
+from .selection import get_backend, BACKENDS
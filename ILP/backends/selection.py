@@ -0,0 +1,16 @@
+from .Backend import Backend
+from .GurobiBackend import GurobiBackend
+from .HighsBackend import HighsBackend
+
+BACKENDS = {'gurobi': GurobiBackend, 'highs': HighsBackend}
+
+
+def get_backend(name: str = None) -> Backend:
+    """ Returns the backend with the given name, 'gurobi' or 'highs'.
+        If the name is None HiGHS is used, Gurobi only when it is requested: the pip package of Gurobi installs
+        with a size-limited license, which fails on the models of real instances """
+    if name is None:
+        name = 'highs'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', choose one of {list(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,229 @@
+import heapq
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+from heuristic.genetic.Chromosome import Chromosome
+from utils import ProblemInstance
+
+
+class _BranchAndBound:
+    """ Exact solver of the partial problem. The DTOs, sorted by stop time, are scheduled by a dynamic programming
+        over the DTOs and the memory used, which respects overlapping and memory constraints. The single satisfaction
+        constraints are relaxed in the Lagrangian way, and a branch and bound on the DTOs of each AR closes the gap """
+
+    def __init__(self, instance: ProblemInstance) -> None:
+        if not np.array_equal(instance.memories, np.round(instance.memories)):
+            raise ValueError('The dynamic programming requires integer memories')
+        self.instance: ProblemInstance = instance
+        self.capacity: int = int(instance.capacity)
+        self.integral: bool = bool(np.array_equal(instance.priorities, np.round(instance.priorities)))
+
+        # the DTOs are scheduled in order of stop time, previous[k] is the number of DTOs that stop before the
+        # start of the k-th one, which are the DTOs that can precede it in the plan
+        self.order = np.argsort(instance.stop_times, kind='stable')
+        self.memories = instance.memories[self.order].astype(np.int64)
+        self.priorities = instance.priorities[self.order].astype(np.float64)
+        self.ar_indices = instance.ar_indices[self.order]
+        self.previous = np.searchsorted(instance.stop_times[self.order], instance.start_times[self.order], side='left')
+
+        # greedy order of the DTOs used to complete the plans, by priority and then by memory
+        self.greedy_order = np.lexsort((self.memories, -self.priorities))
+
+        num_dtos = instance.num_dtos
+        # value of the best schedule of the first k DTOs using at most m memory, and whether it takes the k-th DTO
+        self.values = np.zeros((num_dtos + 1, self.capacity + 1))
+        self.taken = np.zeros((num_dtos + 1, self.capacity + 1), dtype=bool)
+
+        self.best_value: float = 0
+        self.best_selection = np.zeros(0, dtype=np.int64)
+        self.num_nodes: int = 0
+
+    def schedule(self, weights: np.ndarray) -> (np.ndarray, float):
+        """ Returns the DTOs (in stop order) of the schedule with the highest weight, and its weight.
+            DTOs with weight not greater than zero are never taken """
+        values = self.values
+        taken = self.taken
+        capacity = self.capacity
+        for k in range(len(weights)):
+            memory = self.memories[k]
+            if weights[k] <= 0 or memory > capacity:
+                values[k + 1] = values[k]
+                taken[k + 1] = False
+                continue
+            values[k + 1, :memory] = values[k, :memory]
+            taken[k + 1, :memory] = False
+            candidates = values[self.previous[k], :capacity + 1 - memory] + weights[k]
+            np.greater(candidates, values[k, memory:], out=taken[k + 1, memory:])
+            np.maximum(candidates, values[k, memory:], out=values[k + 1, memory:])
+
+        selection = []
+        k = len(weights)
+        memory = capacity
+        while k > 0:
+            if taken[k, memory]:
+                selection.append(k - 1)
+                memory -= self.memories[k - 1]
+                k = self.previous[k - 1]
+            else:
+                k -= 1
+        return np.array(selection[::-1], dtype=np.int64), values[len(weights), capacity]
+
+    def complete(self, selection: np.ndarray, allowed: np.ndarray) -> (np.ndarray, float):
+        """ Turns a schedule into a feasible plan, keeping one DTO for each AR and then adding greedily
+            the allowed DTOs of the ARs not served """
+        starts = self.instance.start_times[self.order]
+        stops = self.instance.stop_times[self.order]
+        ars_served = np.zeros(self.instance.num_ars, dtype=bool)
+        plan = []
+        for k in selection[np.argsort(self.memories[selection], kind='stable')]:
+            if not ars_served[self.ar_indices[k]]:
+                ars_served[self.ar_indices[k]] = True
+                plan.append(k)
+        memory = self.memories[plan].sum()
+
+        plan.sort(key=lambda k_: starts[k_])
+        plan_starts = starts[plan].tolist()
+        for k in self.greedy_order:
+            if not allowed[k] or ars_served[self.ar_indices[k]] or memory + self.memories[k] > self.capacity:
+                continue
+            position = bisect_left(plan_starts, starts[k])
+            if position > 0 and stops[plan[position - 1]] >= starts[k]:
+                continue
+            if position < len(plan) and plan_starts[position] <= stops[k]:
+                continue
+            plan.insert(position, k)
+            plan_starts.insert(position, starts[k])
+            ars_served[self.ar_indices[k]] = True
+            memory += self.memories[k]
+        plan = np.array(plan, dtype=np.int64)
+        return plan, self.priorities[plan].sum()
+
+    def round(self, bound: float) -> float:
+        """ Rounds down an upper bound when the priorities are integer, so the optimal value is too """
+        return float(np.floor(bound + 1e-6)) if self.integral else bound
+
+    def can_improve(self, bound: float) -> bool:
+        """ Returns True if a plan with the given upper bound can be better than the best plan found """
+        if self.integral:
+            return self.round(bound) > self.best_value
+        return bound > self.best_value + 1e-9
+
+    def bound(self, allowed: np.ndarray, multipliers: np.ndarray, iterations: int) \
+            -> (float, np.ndarray, np.ndarray):
+        """
+        Computes the Lagrangian bound of a node by subgradient optimization, updating the best plan found
+
+        :param allowed: the DTOs that can be taken in the node
+        :param multipliers: the initial Lagrangian multipliers of the single satisfaction constraints
+        :param iterations: the maximum number of iterations
+        :return: the bound, the multipliers that gave it and the schedule computed with them
+        """
+        # the constraint of an AR with at most one allowed DTO is always respected
+        relaxed = np.bincount(self.ar_indices[allowed], minlength=self.instance.num_ars) > 1
+        multipliers = np.where(relaxed, multipliers, 0)
+        best_bound = np.inf
+        best_multipliers = multipliers
+        best_selection = np.zeros(0, dtype=np.int64)
+        scale = 2.0
+        stall = 0
+        for _ in range(iterations):
+            weights = np.where(allowed, self.priorities - multipliers[self.ar_indices], 0)
+            selection, value = self.schedule(weights)
+            bound = value + multipliers.sum()
+            if bound < best_bound - 1e-9:
+                best_bound, best_multipliers, best_selection = bound, multipliers, selection
+                stall = 0
+            else:
+                stall += 1
+                if stall == 5:
+                    scale /= 2
+                    stall = 0
+
+            plan, plan_value = self.complete(selection, allowed)
+            if plan_value > self.best_value:
+                self.best_value, self.best_selection = plan_value, plan
+            if not self.can_improve(best_bound):
+                break
+
+            subgradient = np.where(relaxed, 1 - np.bincount(self.ar_indices[selection],
+                                                            minlength=self.instance.num_ars), 0)
+            # multipliers at zero cannot decrease
+            subgradient[(multipliers <= 0) & (subgradient > 0)] = 0
+            norm = np.dot(subgradient, subgradient)
+            if norm == 0:
+                break
+            step = scale * (bound - self.best_value) / norm
+            multipliers = np.maximum(multipliers - step * subgradient, 0)
+        return best_bound, best_multipliers, best_selection
+
+    def branch(self, allowed: np.ndarray, multipliers: np.ndarray, selection: np.ndarray) -> [np.ndarray]:
+        """ Splits a node into two nodes, by dividing the allowed DTOs of an AR """
+        counts = np.bincount(self.ar_indices[selection], minlength=self.instance.num_ars)
+        if counts.max() > 1:
+            # the schedule takes more DTOs of this AR: either its first one is not taken, or it is the only one
+            ar = counts.argmax()
+            dto = selection[self.ar_indices[selection] == ar][0]
+            first = allowed.copy()
+            first[dto] = False
+            second = allowed & (self.ar_indices != ar)
+            second[dto] = True
+            return [first, second]
+
+        # the schedule is feasible but the bound is not tight, the AR with the highest multiplier
+        # is split in two halves of its allowed DTOs
+        candidates = np.flatnonzero(np.bincount(self.ar_indices[allowed], minlength=self.instance.num_ars) > 1)
+        ar = candidates[np.argmax(multipliers[candidates])]
+        dtos = np.flatnonzero(allowed & (self.ar_indices == ar))
+        first = allowed.copy()
+        first[dtos[:len(dtos) // 2]] = False
+        second = allowed.copy()
+        second[dtos[len(dtos) // 2:]] = False
+        return [first, second]
+
+    def solve(self, time_limit: float = None, max_nodes: int = None, root_iterations: int = 100,
+              node_iterations: int = 30) -> float:
+        """ Explores the nodes in best bound order and returns the upper bound on the optimal value.
+            The bound equals the value of the best plan found if the search is complete """
+        start = time.time()
+        allowed = np.ones(self.instance.num_dtos, dtype=bool)
+        bound, multipliers, selection = self.bound(allowed, np.zeros(self.instance.num_ars), root_iterations)
+        nodes = [(-bound, 0, allowed, multipliers, selection)]
+        self.num_nodes = 1
+        while nodes:
+            if not self.can_improve(-nodes[0][0]):
+                nodes = []
+                break
+            if (time_limit is not None and time.time() - start > time_limit) or \
+                    (max_nodes is not None and self.num_nodes >= max_nodes):
+                break
+            _, _, allowed, multipliers, selection = heapq.heappop(nodes)
+            for child in self.branch(allowed, multipliers, selection):
+                bound, child_multipliers, child_selection = self.bound(child, multipliers, node_iterations)
+                self.num_nodes += 1
+                if self.can_improve(bound):
+                    heapq.heappush(nodes, (-bound, self.num_nodes, child, child_multipliers, child_selection))
+
+        if not nodes:
+            return self.best_value
+        return self.round(-nodes[0][0])
+
+
+def solve_partial_problem(instance: ProblemInstance, time_limit: float = None, max_nodes: int = None) \
+        -> (Chromosome, float):
+    """
+    Solves the partial problem (without DLOs) with a dynamic programming over DTOs and memory,
+    a Lagrangian relaxation of the single satisfaction constraints and a branch and bound.
+    Memories must be integer, and the time and space needed grow with DTOs number times the memory capacity
+
+    :param instance: the problem instance
+    :param time_limit: maximum seconds of the search, None for no limit
+    :param max_nodes: maximum number of nodes of the branch and bound, None for no limit
+    :return: the best plan found and an upper bound on the optimal fitness, equal to the fitness of the plan
+             if the plan is optimal
+    """
+    solver = _BranchAndBound(instance)
+    upper_bound = solver.solve(time_limit, max_nodes)
+    dtos = solver.order[solver.best_selection].tolist()
+    return Chromosome(instance, dtos), float(upper_bound)
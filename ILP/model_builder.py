@@ -0,0 +1,89 @@
+import numpy as np
+import scipy.sparse as sp
+
+from ILP.LinearModel import LinearModel
+from utils import ProblemInstance
+from utils.functions import find_maximal_cliques
+
+
+def overlapping_matrix(instance: ProblemInstance, cliques: bool = False) -> sp.csr_matrix:
+    """ Returns the matrix of the overlapping constraints on the DTOs. It has a row for each couple of overlapping DTOs,
+        or a row for each maximal clique of overlapping DTOs if cliques is True, which gives fewer and tighter
+        constraints """
+    if cliques:
+        members, pointers = find_maximal_cliques(instance.start_times, instance.stop_times)
+        return sp.csr_matrix((np.ones(len(members)), members, pointers), shape=(len(pointers) - 1, instance.num_dtos))
+
+    firsts, seconds = instance.get_overlapping_pairs()
+    rows = np.repeat(np.arange(len(firsts)), 2)
+    columns = np.column_stack((firsts, seconds)).ravel()
+    return sp.csr_matrix((np.ones(len(columns)), (rows, columns)), shape=(len(firsts), instance.num_dtos))
+
+
+def single_satisfaction_matrix(instance: ProblemInstance) -> sp.csr_matrix:
+    """ Returns the matrix of the single satisfaction constraints on the DTOs, with a row for each AR having DTOs """
+    ar_indices, rows = np.unique(instance.ar_indices, return_inverse=True)
+    return sp.csr_matrix((np.ones(instance.num_dtos), (rows, np.arange(instance.num_dtos))),
+                         shape=(len(ar_indices), instance.num_dtos))
+
+
+def build_partial_model(instance: ProblemInstance, cliques: bool = False) -> LinearModel:
+    """
+    Builds the model of the partial problem, with a binary variable for each DTO in the block 'DTOs'
+
+    :param instance: the problem instance
+    :param cliques: if True, the overlapping constraints are one for each maximal clique of overlapping DTOs
+    :return: the model, which can be solved by any backend
+    """
+    model = LinearModel(maximize=True)
+    model.add_variables('DTOs', instance.num_dtos, objective=instance.priorities)
+
+    model.add_constraints('Overlapping', {'DTOs': overlapping_matrix(instance, cliques)}, '<', 1)
+    model.add_constraints('SingleSatisfaction', {'DTOs': single_satisfaction_matrix(instance)}, '<', 1)
+    model.add_constraints('Memory', {'DTOs': sp.csr_matrix(instance.memories.reshape(1, -1))}, '<',
+                          instance.capacity)
+    return model
+
+
+def build_complete_model(instance: ProblemInstance, cliques: bool = False) -> LinearModel:
+    """
+    Builds the model of the complete problem. The blocks of variables are: 'DTOs', with one for each DTO taken
+    in the plan, 'Downloads', with one for each couple (DLO j, DTO i) at index j * DTOs number + i which is 1
+    if the DTO is downloaded by the DLO, and 'Memories', with one for each DLO with the memory occupied right
+    before it
+
+    :param instance: the problem instance
+    :param cliques: if True, the overlapping constraints are one for each maximal clique of overlapping DTOs
+    :return: the model, which can be solved by any backend
+    """
+    num_dtos = instance.num_dtos
+    num_dlos = instance.num_dlos
+    memories = sp.csr_matrix(instance.memories.reshape(1, -1))
+
+    # a DTO can be downloaded only by the DLOs that come after it
+    downloadable = instance.dto_segments[np.newaxis, :] <= np.arange(num_dlos)[:, np.newaxis]
+    model = LinearModel(maximize=True)
+    model.add_variables('DTOs', num_dtos, objective=instance.priorities)
+    model.add_variables('Downloads', num_dlos * num_dtos, upper_bounds=downloadable.ravel())
+    model.add_variables('Memories', num_dlos, upper_bounds=instance.capacity, integer=False)
+
+    model.add_constraints('Overlapping', {'DTOs': overlapping_matrix(instance, cliques)}, '<', 1)
+    model.add_constraints('SingleSatisfaction', {'DTOs': single_satisfaction_matrix(instance)}, '<', 1)
+    # a DTO can be downloaded only once, and only if it is in the plan
+    model.add_constraints('Downlink', {'DTOs': -sp.identity(num_dtos, format='csr'),
+                                       'Downloads': sp.kron(np.ones((1, num_dlos)), sp.identity(num_dtos))},
+                          '<', 0)
+    # the memory downloaded by each DLO cannot exceed its downlink capacity
+    model.add_constraints('DownlinkCapacity', {'Downloads': sp.kron(sp.identity(num_dlos), memories)}, '<',
+                          instance.dlo_capacities)
+    # the memory before the DLO j is the one before the DLO j - 1, minus the memory downloaded by the DLO j - 1,
+    # plus the memory of the DTOs taken between the two DLOs
+    acquired = instance.dto_segments < num_dlos
+    model.add_constraints('MemoryBalance', {
+        'DTOs': sp.csr_matrix((-instance.memories[acquired],
+                               (instance.dto_segments[acquired], np.flatnonzero(acquired))),
+                              shape=(num_dlos, num_dtos)),
+        'Downloads': sp.kron(sp.eye(num_dlos, k=-1), memories),
+        'Memories': sp.identity(num_dlos) - sp.eye(num_dlos, k=-1)
+    }, '=', 0)
+    return model
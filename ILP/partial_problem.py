@@ -1,98 +1,46 @@
+import sys
 import time
 
-import gurobipy as gp
-import numpy as np
-from gurobipy import GRB
-
-from utils.functions import overlap, load_instance
+from ILP.backends import get_backend
+from ILP.model_builder import build_partial_model
+from utils.functions import load_columns, prepare_instance
 
 INSTANCE = 'test_partial'
-dtos, ars, constants, paws = load_instance(INSTANCE)[:4]
-
-# get rid of dtos overlapping with paws and dlos
-filtered_dtos = []
-for dto in dtos:
-    skip = False
-    for event in paws:
-        if overlap(dto, event):
-            skip = True
-            break
-    if not skip:
-        filtered_dtos.append(dto)
-
-print(f"Total DTOs: {len(dtos)}")
-print(f"Filtered DTOs: {len(filtered_dtos)}")
-dtos = filtered_dtos
-
-CAPACITY = constants['MEMORY_CAP']
-DTOS_NUMBER = len(dtos)
-
-priorities = []
-
-# populate array of priorities
-for index_dto, dto in enumerate(dtos):
-    priorities.append(next((ar['rank'] for ar in ars if ar['id'] == dto['ar_id']), None))
+# add one overlapping constraint for each maximal clique of overlapping DTOs, instead of one for each couple
+OVERLAPPING_CLIQUES = True
+# solver backend, 'gurobi' or 'highs', given as first argument. If not given HiGHS is used
+BACKEND = sys.argv[1] if len(sys.argv) > 1 else None
+dtos, ars, constants, paws = load_columns(INSTANCE)[:4]
 
-memories = np.array(list(map(lambda dto_: dto_["memory"], dtos)))
+# get rid of dtos overlapping with paws
+instance = prepare_instance(dtos, ars, constants, paws)
 
-# Read and solve model
-model = gp.Model()
+print(f"Total DTOs: {len(dtos['id'])}")
+print(f"Filtered DTOs: {instance.num_dtos}")
 
 print("Prepare variables and constraints...")
 start = time.time()
 
-# add the decision variables to the model
-dtos_variables = list(model.addMVar((DTOS_NUMBER,), vtype=GRB.BINARY, name="DTOs"))
-
-grouped_dtos = dict()
-
-# for each couple of dtos which overlap add a constraint
-for i1, dto1 in enumerate(dtos):
-    for i2, dto2 in enumerate(dtos):
-        if overlap(dto1, dto2) and dto1 != dto2:
-            # add overlapping constraints
-            model.addConstr(dtos_variables[i1] + dtos_variables[i2] <= 1,
-                            f"Overlapping constraint for DTOs {dto1['id']} and {dto2['id']}")
-
-    if dto1['ar_id'] not in grouped_dtos.keys():
-        grouped_dtos[dto1['ar_id']] = [dto1]
-    else:
-        grouped_dtos[dto1['ar_id']].append(dto1)
-
-# add the single satisfaction constraints
-for ar_id in grouped_dtos.keys():
-    model.addConstr(gp.quicksum([dtos_variables[dtos.index(dto_)]
-                                 for dto_ in grouped_dtos[ar_id]]) <= 1,
-                    f"Single satisfaction constraint for {ar_id}")
-
-# add the memory constraint
-model.addConstr(gp.quicksum([memories[i] * dtos_variables[i]
-                             for i in range(DTOS_NUMBER)]) <= CAPACITY,
-                "Memory constraint")
-# set objective function to maximize dtos priority
-model.setObjective(gp.quicksum([priorities[i] * dtos_variables[i]
-                                for i in range(DTOS_NUMBER)]), GRB.MAXIMIZE)
+model = build_partial_model(instance, OVERLAPPING_CLIQUES)
 
 end = time.time()
-print("Preparation terminated in ", end - start)
+build_time = end - start
+print("Preparation terminated in ", build_time)
 
 # solve model
-print("Solve model...")
+backend = get_backend(BACKEND)
+print(f"Solve model with {backend.name}...")
 start = time.time()
 
-model.optimize()
+solution = backend.solve(model)
+solve_time = time.time() - start
 
-if model.Status == GRB.INF_OR_UNBD:
-    # Turn pre-solve off to determine whether model is infeasible or unbounded
-    model.setParam(GRB.Param.Presolve, 0)
-    model.optimize()
-if model.Status == GRB.OPTIMAL:
-    print('Optimal objective: %g' % model.ObjVal)
-    print(model.getJSONSolution())
-    print(f'Number of constraints: {len(model.getConstrs())}')
-    print(f'Number of Variables {len(model.getVars())}')
-elif model.Status != GRB.INFEASIBLE:
-    print('Optimization was stopped with status %d' % model.Status)
+if solution.is_optimal():
+    print('Optimal objective: %g' % solution.objective)
+    print(solution.to_json(model.get_variable_names()))
+    print(f'Number of constraints: {model.num_constraints}')
+    print(f'Number of Variables {model.num_variables}')
+else:
+    print(f'Optimization was stopped with status {solution.status}')
 
-end = time.time()
-print("Solved in ", end - start)
+print("Solved in ", solve_time)
@@ -1,52 +1,88 @@
-import collections
-
-from copy import deepcopy
+import heapq
+from bisect import bisect_left, insort
 from typing import Optional
 
 import numpy as np
 from matplotlib import pyplot as plt
-from random import sample
+from random import randint, randrange
 
-from utils import Constraint
-from utils.functions import overlap, binary_search, find_insertion_point
-from .my_types import DTO, AR, DLO, DEBUG
+from utils import Constraint, ProblemInstance
+from .instrumentation import counters, REPAIR_REMOVALS, INSERTION_ATTEMPTS, INSERTION_SUCCESSES, FEASIBILITY_CHECKS
+from . import my_types
+from .my_types import DTO, DLO
 
 
 class Chromosome:
-    """ A class that represents a possible solution of GeneticAlgorithm class """
+    """ A class that represents a possible solution of GeneticAlgorithm class.
+        DTOs and DLOs are referenced by their index in the problem instance """
 
-    def __init__(self, capacity: float, ars: [AR], dtos: [DTO] = None,
-                 tot_dlos: [DLO] = None, downlink_rate: float = None) -> None:
-        """ If no argument is given, creates an empty solution, otherwise creates a solution with given DTOs """
+    def __init__(self, instance: ProblemInstance, dtos: [DTO] = None) -> None:
+        """ If no DTO is given, creates an empty solution, otherwise creates a solution with given DTOs.
+            The instance is shared and never copied, while the given list of DTOs is owned by the solution """
         if dtos is None:
             dtos = []
-        if tot_dlos is None:
-            tot_dlos = []
-        # Loads DTOs
-        self.dtos: [DTO] = deepcopy(dtos)
-        self.dtos = sorted(self.dtos, key=lambda dto_: dto_['start_time'])
-        # Loads ARs
-        self.ars: [AR] = deepcopy(ars)
-        # Loads DLOs
-        self.dlos: [DLO] = []
-        if tot_dlos is not None:
-            self.dlos = deepcopy(tot_dlos)
-
-        self.dlos = sorted(self.dlos, key=lambda dlo_: dlo_['start_time'])
-
-        if len(self.dtos) == 0:
-            self.ar_ids_served: [int] = []
-            self.ars_served = np.full(len(ars), False)
-        else:
-            self.ar_ids_served: [int] = [dto['ar_id'] for dto in self.dtos]
-            self.ars_served = np.isin(list(map(lambda ar: ar['id'], self.ars)),
-                                      self.ar_ids_served)
-
-        self.fitness: float = sum(self.get_priorities())
-        self.tot_memory: float = sum(self.get_memories())
-
-        self.capacity: float = capacity
-        self.downlink_rate: float = downlink_rate
+        self.instance: ProblemInstance = instance
+        # the instance is sorted by start time, so sorting the indexes sorts the DTOs by start time
+        dtos.sort()
+        self.dtos: [DTO] = dtos
+
+        # DTOs in the plan as a bitset (the bit i % 8 of the byte i // 8 is the DTO i) and copies of the DTOs
+        # beyond the first one, which only crossovers create, so that duplicates are checked in constant time
+        # with a bit for each DTO of the instance
+        dto_array = np.asarray(self.dtos, dtype=np.int64)
+        self.dto_bits = np.zeros((instance.num_dtos + 7) // 8, dtype=np.uint8)
+        np.bitwise_or.at(self.dto_bits, dto_array >> 3, (1 << (dto_array & 7)).astype(np.uint8))
+        repeated, copies = np.unique(dto_array[1:][np.diff(dto_array) == 0], return_counts=True)
+        self.duplicates: {DTO: int} = dict(zip(repeated.tolist(), copies.tolist()))
+        self.excess_dtos: int = int(copies.sum())
+
+        # number of times each AR is in the plan and how many times ARs are in the plan beyond the first one,
+        # so that single satisfaction is checked in constant time
+        ar_indices = instance.ar_indices[self.dtos]
+        self.ar_counts = np.bincount(ar_indices, minlength=instance.num_ars).astype(np.int32)
+        self.ars_served = self.ar_counts > 0
+        self.excess_ars: int = len(self.dtos) - np.count_nonzero(self.ars_served)
+
+        # fitness and total memory of the plan, and memory of the DTOs acquired in each segment between two DLOs
+        # (a single segment without DLOs). Like the counts, they are arrays updated in place, so that they can be
+        # a row of a PopulationMatrix
+        self.totals = np.array([instance.priorities[self.dtos].sum(), instance.memories[self.dtos].sum()],
+                               dtype=np.float64)
+        self.segment_memories = np.bincount(instance.dto_segments[self.dtos], weights=instance.memories[self.dtos],
+                                            minlength=instance.num_dlos + 1).astype(np.float64)
+
+        self.capacity: float = instance.capacity
+        self.downlink_rate: float = instance.downlink_rate
+
+        # DLO that downloads each downloaded DTO, memory downloaded by each DLO and memory profile of the plan,
+        # where the memory level j is the memory occupied right before the DLO j (the last one is the end of the plan)
+        self.downloads: {DTO: DLO} = {}
+        self.downloaded_memories = np.zeros(instance.num_dlos)
+        self.memory_levels = np.zeros(instance.num_dlos + 1)
+        if instance.has_dlos():
+            self.memory_levels = self.compute_memory_levels()
+
+        # results of the last checks of the constraints that need a scan of the plan, a constraint is removed
+        # when a change of the plan may have changed its result
+        self.verified_constraints: {Constraint: bool} = {}
+
+    @property
+    def fitness(self) -> float:
+        """ Sum of the priorities of the DTOs in the plan """
+        return self.totals.item(0)
+
+    @fitness.setter
+    def fitness(self, fitness: float):
+        self.totals[0] = fitness
+
+    @property
+    def tot_memory(self) -> float:
+        """ Sum of the memories of the DTOs in the plan """
+        return self.totals.item(1)
+
+    @tot_memory.setter
+    def tot_memory(self, tot_memory: float):
+        self.totals[1] = tot_memory
 
     def print(self) -> None:
         """ Prints all info about the solution """
@@ -58,15 +94,15 @@ class Chromosome:
 
     def get_memories(self) -> [float]:
         """ Returns the memory costs of each DTO in the solution """
-        return list(map(lambda dto_: dto_['memory'], self.dtos))
+        return self.instance.memories[self.dtos].tolist()
 
     def get_dto_ids(self) -> [int]:
         """ Returns the ids of each DTO in the solution """
-        return list(map(lambda dto_: dto_['id'], self.dtos))
+        return self.instance.dto_ids[self.dtos].tolist()
 
     def get_priorities(self) -> [float]:
         """ Returns the priorities of the DTOs in the solution """
-        return list(map(lambda dto_: dto_['priority'], self.dtos))
+        return self.instance.priorities[self.dtos].tolist()
 
     def get_tot_memory(self) -> float:
         """ Returns the total memory occupied of the solution """
@@ -77,9 +113,8 @@ class Chromosome:
         return self.fitness
 
     def get_ars_served(self) -> [int]:
-        """ Returns the ARs ids satisfied by the solution """
-        # return list(map(lambda dto: dto['ar_id'], self.dtos))
-        return self.ar_ids_served
+        """ Returns the ARs ids satisfied by each DTO of the solution """
+        return self.instance.ar_ids[self.instance.ar_indices[self.dtos]].tolist()
 
     def get_last_dto(self) -> Optional[DTO]:
         """ Returns the last DTO in the solution """
@@ -90,103 +125,94 @@ class Chromosome:
 
     def get_dtos_before_dlo(self, dlo: DLO):
         """ Returns the DTOs that comes before the given DLO """
-        return [dto for dto in self.dtos if dto['stop_time'] < dlo['start_time']]
+        return [dto for dto in self.dtos if self.instance.stop_times[dto] < self.instance.dlo_start_times[dlo]]
 
     def get_dtos_between_dates(self, start_time: float, stop_time: float):
         """ Returns the DTOs between the given interval """
-        return [dto for dto in self.dtos if dto['start_time'] > start_time and dto['stop_time'] < stop_time]
+        return [dto for dto in self.dtos
+                if self.instance.start_times[dto] > start_time and self.instance.stop_times[dto] < stop_time]
 
     def add_dto(self, dto: DTO) -> bool:
         """ Adds a DTO to the solution in start time order, updates total memory, fitness and ARs served.
             Returns True if the insertion """
-        if self.ars_served[dto['ar_index']]:
+        ar_index = self.instance.ar_indices[dto]
+        if self.ars_served[ar_index]:
             return False
 
-        index = find_insertion_point(dto, self.dtos)
-        self.dtos.insert(index, dto)
-        self.tot_memory += dto['memory']
-        self.fitness += dto['priority']
-        self.ars_served[dto['ar_index']] = True
-        self.ar_ids_served.append(dto['ar_id'])
+        insort(self.dtos, dto)
+        self.totals[0] += self.instance.priorities[dto]
+        self.totals[1] += self.instance.memories[dto]
+        self.dto_bits[dto >> 3] |= 1 << (dto & 7)
+        self.ar_counts[ar_index] += 1
+        self.segment_memories[self.instance.dto_segments[dto]] += self.instance.memories[dto]
+        self.ars_served[ar_index] = True
+        self.verified_constraints.pop(Constraint.MEMORY, None)
+        self.verified_constraints.pop(Constraint.OVERLAP, None)
+        # until it is downloaded, the DTO stays in memory from its acquisition to the end of the plan
+        if self.instance.has_dlos():
+            self.memory_levels[self.instance.dto_segments[dto]:] += self.instance.memories[dto]
         return True
 
     def add_and_download_dto(self, dto: DTO) -> bool:
-        """ Tries to add and download a DTO to the solution,
-        returns True if the insertion is successful """
-        if len(self.dlos) == 0:
+        """ Tries to add and download a DTO to the solution in the first DLO able to do it,
+        returns True if the insertion is successful.
+        Only the memory levels between the acquisition and the download of the DTO are checked """
+        if not self.instance.has_dlos():
             raise Exception("This method works only with downlink problems")
+        counters[INSERTION_ATTEMPTS] += 1
 
         # Checks if AR of the DTO is already served, and if DTO is already in the plan
-        if self.ars_served[dto['ar_index']]:
+        if self.ars_served[self.instance.ar_indices[dto]]:
             return False
 
         # Checks if the DTO would overlap with another DTO
-        insertion_index = find_insertion_point(dto, self.dtos)
-        if insertion_index == 0:
-            if overlap(dto, self.dtos[0]):
-                return False
-        elif insertion_index == len(self.dtos):
-            if overlap(dto, self.dtos[-1]):
-                return False
-        else:
-            if overlap(dto, self.dtos[insertion_index - 1]) or overlap(dto, self.dtos[insertion_index]):
-                return False
+        if self.overlaps_plan(dto):
+            return False
+
+        # the DTO occupies memory from its acquisition until the DLO that downloads it
+        dlo = self.find_downlink(dto)
+        last_level = dlo if dlo is not None else self.instance.num_dlos
+        memory_levels = self.memory_levels[self.instance.dto_segments[dto]:last_level + 1]
+        if memory_levels.max() + self.instance.memories[dto] > self.capacity:
+            return False
 
-        backup_dlos = deepcopy(self.dlos)
         self.add_dto(dto)
+        if dlo is not None:
+            self.download_dto(dto, dlo)
 
-        memory: float = 0
-        added = False
-        success: bool = True
-        dtos_in_memory: [DTO] = []
-        i: int = 0
-        j: int = 0
-        while i < len(self.dtos) and success:
-            # if the DTO comes before the DLO j, sum its memory
-            if self.dtos[i]['stop_time'] < self.dlos[j]['start_time']:
-                memory = memory + self.dtos[i]['memory']
-                dtos_in_memory.append(self.dtos[i].copy())
-                if dto == self.dtos[i]:
-                    added = True
-                # if memory exceed because the new DTO is added, stop iterating and return False
-                if memory > self.capacity:
-                    success = False
-                i += 1
-            else:
-                # the DLO j downloads all DTOs that were already there
-                memory_downloaded: float = 0
-                if not added:
-                    for dto_ in self.dlos[j]['downloaded_dtos']:
-                        memory -= dto_['memory']
-                        memory_downloaded += dto_['memory']
-                        dtos_in_memory.remove(dto_)
-                else:
-                    self.dlos[j]['downloaded_dtos'] = []
-                    dtos_in_memory.sort(key=lambda dto__: dto__['memory'], reverse=True)
-                    z: int = 0
-                    while z < len(dtos_in_memory):
-                        if self.is_dto_downloadable(dtos_in_memory[z], self.dlos[j], memory_downloaded):
-                            self.dlos[j]['downloaded_dtos'].append(dtos_in_memory[z].copy())
-                            memory -= dtos_in_memory[z]['memory']
-                            memory_downloaded += dtos_in_memory[z]['memory']
-                            dtos_in_memory.remove(dtos_in_memory[z].copy())
-                            z -= 1
-                        z += 1
-                j += 1
-
-        if not success:
-            self.remove_dto(dto)
-            self.dlos = backup_dlos
-
-        if DEBUG and not self.is_feasible():
+        if my_types.DEBUG and not self.is_feasible():
             raise Exception("Plan is not feasible")
 
-        return success
+        counters[INSERTION_SUCCESSES] += 1
+        return True
+
+    def find_downlink(self, dto: DTO) -> Optional[DLO]:
+        """ Returns the first DLO with enough residual capacity to download the DTO, None if there is not """
+        segment = self.instance.dto_segments[dto]
+        residuals = self.instance.dlo_capacities[segment:] - self.downloaded_memories[segment:]
+        candidates = np.flatnonzero(residuals >= self.instance.memories[dto])
+        if len(candidates) == 0:
+            return None
+        return segment + candidates[0].item()
+
+    def download_dto(self, dto: DTO, dlo: DLO) -> None:
+        """ Downloads a DTO of the plan in the given DLO, freeing its memory from the next memory level on """
+        memory = self.instance.memories[dto]
+        self.downloads[dto] = dlo
+        self.downloaded_memories[dlo] += memory
+        self.memory_levels[dlo + 1:] -= memory
+        self.verified_constraints.pop(Constraint.MEMORY, None)
+
+    def has_dto(self, dto: DTO) -> bool:
+        """ Returns True if the DTO is in the solution """
+        return bool(self.dto_bits[dto >> 3] >> (dto & 7) & 1)
 
     def remove_dto(self, dto: DTO) -> bool:
         """ Removes a DTO from the solution """
-        index = binary_search(dto, self.dtos)
-        if index == -1:
+        if not self.has_dto(dto):
+            return False
+        index = bisect_left(self.dtos, dto)
+        if index == len(self.dtos) or self.dtos[index] != dto:
             return False
         return self.remove_dto_at(index)
 
@@ -195,41 +221,90 @@ class Chromosome:
         if index < 0 or index >= len(self.dtos):
             print(f'Index:{index}, len(self.dtos):{len(self.dtos)}')
             raise IndexError("Index out of range")
-        dto = self.dtos[index]
-        self.ar_ids_served.remove(dto['ar_id'])
-        self.dtos.pop(index)
-        self.tot_memory -= dto['memory']
-        self.fitness -= dto['priority']
-
-        if dto['ar_id'] not in self.ar_ids_served:
-            self.ars_served[dto['ar_index']] = False
-
-        for dlo in self.dlos:
-            if dto in dlo['downloaded_dtos']:
-                dlo['downloaded_dtos'].remove(dto)
+        self.discard_dto(self.dtos.pop(index))
+
+    def remove_dtos_at(self, indexes: [int]):
+        """ Removes the DTOs at the given indexes with a single pass on the plan """
+        if len(indexes) == 0:
+            return
+        dtos = np.array(self.dtos)
+        removed = np.zeros(len(dtos), dtype=bool)
+        removed[indexes] = True
+        removed_dtos = dtos[removed]
+        dlos = [self.discard_dto(dto, update_memory_levels=False) for dto in removed_dtos.tolist()]
+        self.dtos = dtos[~removed].tolist()
+
+        if self.instance.has_dlos():
+            # the memory profile is updated once for all the removed DTOs
+            num_levels = self.instance.num_dlos + 1
+            memories = self.instance.memories[removed_dtos]
+            downloaded = np.array([dlo is not None for dlo in dlos], dtype=bool)
+            downloaded_dlos = np.array([dlo for dlo in dlos if dlo is not None], dtype=np.int64)
+            freed_memories = np.bincount(self.instance.dto_segments[removed_dtos], weights=memories,
+                                         minlength=num_levels) - \
+                np.bincount(downloaded_dlos + 1, weights=memories[downloaded], minlength=num_levels)
+            self.memory_levels -= np.cumsum(freed_memories)
+            self.downloaded_memories -= np.bincount(downloaded_dlos, weights=memories[downloaded],
+                                                    minlength=self.instance.num_dlos).astype(np.float64)
+
+    def discard_dto(self, dto: DTO, update_memory_levels: bool = True) -> Optional[DLO]:
+        """ Updates fitness, memory, counts and downloads after the removal of a DTO from the list of the plan.
+            Returns the DLO that downloaded the DTO, None if it was not downloaded """
+        ar_index = self.instance.ar_indices[dto]
+        self.totals[0] -= self.instance.priorities[dto]
+        self.totals[1] -= self.instance.memories[dto]
+        self.segment_memories[self.instance.dto_segments[dto]] -= self.instance.memories[dto]
+
+        copies = self.duplicates.pop(dto, 0)
+        if copies > 0:
+            self.excess_dtos -= 1
+            if copies > 1:
+                self.duplicates[dto] = copies - 1
+        else:
+            self.dto_bits[dto >> 3] &= ~(1 << (dto & 7)) & 0xFF
+        self.ar_counts[ar_index] -= 1
+        if self.ar_counts[ar_index] > 0:
+            self.excess_ars -= 1
+        else:
+            self.ars_served[ar_index] = False
+
+        # a removal frees memory, so a plan that respects the memory constraint keeps respecting it,
+        # while the DTOs around the removed one become adjacent and may overlap
+        if not self.verified_constraints.get(Constraint.MEMORY, True):
+            del self.verified_constraints[Constraint.MEMORY]
+        self.verified_constraints.pop(Constraint.OVERLAP, None)
+
+        dlo = self.downloads.pop(dto, None)
+        if self.instance.has_dlos() and update_memory_levels:
+            memory = self.instance.memories[dto]
+            if dlo is None:
+                self.memory_levels[self.instance.dto_segments[dto]:] -= memory
+            else:
+                self.memory_levels[self.instance.dto_segments[dto]:dlo + 1] -= memory
+                self.downloaded_memories[dlo] -= memory
+        return dlo
+
+    def overlaps_plan(self, dto: DTO) -> bool:
+        """ Returns True if the DTO would overlap with its neighbours in the plan """
+        index = bisect_left(self.dtos, dto)
+        if index > 0 and self.instance.overlap(dto, self.dtos[index - 1]):
+            return True
+        if index < len(self.dtos) and self.instance.overlap(dto, self.dtos[index]):
+            return True
+        return False
 
     def keeps_feasibility(self, dto: DTO) -> bool:
         """ Returns True if the solution keeps feasibility if the DTO would be added """
         # Checks if the DTO would exceed the memory limit
-        if self.get_tot_memory() + dto['memory'] > self.capacity:
+        if self.totals.item(1) + self.instance.memories.item(dto) > self.capacity:
             return False
 
         # Checks if AR of the DTO is already served, and if DTO is already in the plan
-        if self.ars_served[dto['ar_index']]:
+        if self.ars_served[self.instance.ar_indices[dto]]:
             return False
 
         # Checks if the DTO would overlap with another DTO
-        index = find_insertion_point(dto, self.dtos)
-        if index == 0:
-            if overlap(dto, self.dtos[0]):
-                return False
-        elif index == len(self.dtos):
-            if overlap(dto, self.dtos[-1]):
-                return False
-        else:
-            if overlap(dto, self.dtos[index - 1]) or overlap(dto, self.dtos[index]):
-                return False
-        return True
+        return not self.overlaps_plan(dto)
 
     def is_feasible(self, constraint: Constraint = None) -> bool:
         """ Checks if the solution is feasible or not.
@@ -253,167 +328,283 @@ class Chromosome:
                 return False
 
     def is_constraint_respected(self, constraint: Constraint) -> bool:
-        """ Returns true if the solution respects the given constraint, false otherwise """
+        """ Returns true if the solution respects the given constraint, false otherwise.
+            The result of the memory and overlap constraints is cached until the plan changes """
+        if constraint in self.verified_constraints:
+            return self.verified_constraints[constraint]
+        if constraint == Constraint.MEMORY or constraint == Constraint.OVERLAP:
+            self.verified_constraints[constraint] = self.check_constraint(constraint)
+            return self.verified_constraints[constraint]
+        return self.check_constraint(constraint)
+
+    def check_constraint(self, constraint: Constraint) -> bool:
+        """ Checks from scratch if the solution respects the given constraint """
+        counters[FEASIBILITY_CHECKS] += 1
         if constraint == Constraint.MEMORY:
-            if len(self.dlos) == 0:  # if problem is relaxed
-                return self.get_tot_memory() < self.capacity
+            if not self.instance.has_dlos():  # if problem is relaxed
+                return self.get_tot_memory() <= self.capacity
             else:  # if problem includes down-links
-                memory: float = 0
-                i: int = 0
-                j: int = 0
-
-                while i < len(self.dtos):
-                    # if the DTO comes before the DLO j, sum its memory
-                    if self.dtos[i]['stop_time'] < self.dlos[j]['start_time']:
-                        memory = memory + self.dtos[i]['memory']
-                        # if memory exceed because the new DTO is added, stop iterating and return False
-                        if memory > self.capacity:
-                            return False
-                        i += 1
-                    else:
-                        for dto in self.dlos[j]['downloaded_dtos']:
-                            memory = memory - dto['memory']
-
-                        if memory < 0:
-                            return False
-                        j += 1
-
-                return True
+                dtos = np.fromiter(self.downloads.keys(), dtype=np.int64, count=len(self.downloads))
+                dlos = np.fromiter(self.downloads.values(), dtype=np.int64, count=len(self.downloads))
+                # a DTO can be downloaded only by a DLO that comes after it
+                if np.any(self.instance.dto_segments[dtos] > dlos):
+                    return False
+                downloaded_memories = np.bincount(dlos, weights=self.instance.memories[dtos],
+                                                  minlength=self.instance.num_dlos)
+                if np.any(downloaded_memories > self.instance.dlo_capacities):
+                    return False
+                return self.compute_memory_levels().max() <= self.capacity
 
         elif constraint == Constraint.OVERLAP:
             for index in range(self.size() - 1):
-                if overlap(self.dtos[index], self.dtos[index + 1]):
+                if self.instance.overlap(self.dtos[index], self.dtos[index + 1]):
                     return False
             return True
 
         elif constraint == Constraint.SINGLE_SATISFACTION:
-            return len(self.get_ars_served()) == len(set(self.get_ars_served()))
+            return self.excess_ars == 0
 
         elif constraint == Constraint.DUPLICATES:
-            return len(self.get_dto_ids()) == len(set(self.get_dto_ids()))
+            return self.excess_dtos == 0
+
+    def compute_memory_levels(self) -> np.ndarray:
+        """ Computes from scratch the memory occupied right before each DLO and at the end of the plan """
+        num_levels = self.instance.num_dlos + 1
+        dtos = np.fromiter(self.downloads.keys(), dtype=np.int64, count=len(self.downloads))
+        dlos = np.fromiter(self.downloads.values(), dtype=np.int64, count=len(self.downloads))
+        # memory downloaded by the DLO j is freed from the memory level j + 1 on
+        freed_memories = np.bincount(dlos + 1, weights=self.instance.memories[dtos], minlength=num_levels)
+        # bincount returns integers when the plan is empty, the levels are always updated in place as floats
+        return np.cumsum(self.segment_memories - freed_memories, dtype=np.float64)
 
     def is_dto_downloaded(self, dto: DTO) -> bool:
         """ Returns true if the given DTO is downloaded in the solution """
-        for dlo in self.dlos:
-            index = binary_search(dto, dlo['downloaded_dtos'])
-            if index != -1:
-                return True
-        return False
+        return dto in self.downloads
 
     def is_dto_downloadable(self, dto: DTO, dlo: DLO, memory_downloaded: float) -> bool:
         """ Returns true if the given DTO is downloaded in the solution """
-        if dto['stop_time'] >= dlo['start_time']:
+        if self.instance.stop_times[dto] >= self.instance.dlo_start_times[dlo]:
             raise Exception('The DTO comes after the DLO')
-        return memory_downloaded + dto['memory'] <= self.downlink_rate * (dlo['stop_time'] - dlo['start_time'])
+        return memory_downloaded + self.instance.memories[dto] <= self.instance.dlo_capacities[dlo]
 
     def repair_memory(self):
         """ Repairs the memory constraint of the solution """
-        if len(self.dlos) == 0:  # if problem is relaxed
+        if not self.instance.has_dlos():  # if problem is relaxed
             while not self.is_feasible(Constraint.MEMORY):
                 index = np.random.randint(self.size())
                 self.remove_dto_at(index)
-            return True
-        else:  # if problem includes down-links
-            dtos_copy = self.dtos.copy()
-            memory: float = 0
-            for dlo in self.dlos:
-                i: int = 0
-                start_index = i
-                while i < len(dtos_copy) and dlo['start_time'] > dtos_copy[i]['stop_time']:
-                    memory = memory + dtos_copy[i]['memory']
-                    i += 1
-
-                restart = False
-                while memory > self.capacity:
-                    index = np.random.randint(start_index, i)
-                    memory = memory - dtos_copy[index]['memory']
-                    self.remove_dto(dtos_copy[index])
-                    dtos_copy.pop(index)
-                    i -= 1
-                    restart = True
-                if restart:
-                    return False
-
-                for dto in dlo['downloaded_dtos']:
-                    memory = memory - dto['memory']
-
-                dtos_copy = dtos_copy[i:]
-
-            return True
-
-    def repair_overlap(self):
-        """ Repairs the overlap constraint of the solution """
-        while not self.is_feasible(Constraint.OVERLAP):
-            i: int = 0
-            while i < self.size() - 1:
-                if overlap(self.dtos[i], self.dtos[i + 1]):
-                    self.remove_dto_at(np.random.randint(i, i + 2))
-                    i -= 1
+            return
+
+        # if problem includes down-links
+        if np.any(self.downloaded_memories > self.instance.dlo_capacities):
+            self.update_downloaded_dtos()
+        if self.memory_levels.max(initial=0) <= self.capacity:
+            return
+
+        # walks the memory levels once, keeping in a heap the DTOs in memory by priority per unit of memory.
+        # At each exceeding level the DTOs with the lowest ratio are removed until it fits, the removals only
+        # lower the levels, so the levels already walked keep fitting
+        memories = self.instance.memories
+        segments = self.instance.dto_segments
+        ratios = self.instance.priorities / np.maximum(memories, np.finfo(float).tiny)
+        plan_order = sorted(self.dtos, key=lambda dto_: segments[dto_])
+        # DTOs not downloaded, from the largest, which can take the downlink capacity freed by the removals
+        waiting: [DTO] = sorted((dto for dto in self.dtos if dto not in self.downloads),
+                                key=lambda dto_: memories[dto_], reverse=True)
+        in_memory: [(float, DTO)] = []
+        removed: {DTO} = set()
+        i: int = 0
+        for level in np.flatnonzero(self.memory_levels > self.capacity).tolist():
+            if self.memory_levels[level] <= self.capacity:
+                continue
+            # the DTOs acquired before the level enter the heap
+            while i < len(plan_order) and segments[plan_order[i]] <= level:
+                heapq.heappush(in_memory, (ratios[plan_order[i]], plan_order[i]))
                 i += 1
+            while self.memory_levels[level] > self.capacity and in_memory:
+                _, dto = heapq.heappop(in_memory)
+                # a DTO downloaded by a DLO before the level is no longer in memory
+                if self.downloads.get(dto, self.instance.num_dlos) < level:
+                    continue
+                dlo = self.discard_dto(dto)
+                removed.add(dto)
+                if dlo is not None:
+                    # the DLO is not before the level, so the new downloads lower only the next levels
+                    waiting = self.fill_downlink(dlo, waiting)
+
+        self.dtos = [dto for dto in self.dtos if dto not in removed]
+
+    def fill_downlink(self, dlo: DLO, waiting: [DTO]) -> [DTO]:
+        """ Downloads in the residual capacity of the DLO the DTOs of the given list acquired before it,
+            in the list order. Returns the DTOs of the list still not downloaded, DTOs of the list already
+            removed from the plan are skipped and dropped """
+        residual = self.instance.dlo_capacities[dlo] - self.downloaded_memories[dlo]
+        still_waiting: [DTO] = []
+        for dto in waiting:
+            if not self.has_dto(dto):
+                continue
+            if self.instance.dto_segments[dto] <= dlo and self.instance.memories[dto] <= residual:
+                self.download_dto(dto, dlo)
+                residual -= self.instance.memories[dto]
+            else:
+                still_waiting.append(dto)
+        return still_waiting
+
+    def repair_overlap(self, keep_best: bool = False):
+        """ Repairs the overlap constraint of the solution with a single sweep in start time order.
+            Of two overlapping DTOs one is removed randomly, or the one with the lower priority per unit of memory
+            if keep_best is True """
+        start_times = self.instance.start_times
+        stop_times = self.instance.stop_times
+        priorities = self.instance.priorities
+        memories = self.instance.memories
+        removed: [int] = []
+        # position of the last DTO kept, the kept DTOs never overlap each other, and a DTO overlaps
+        # a kept one only if it overlaps the last one, since it starts after all of them
+        last: int = -1
+        for index, dto in enumerate(self.dtos):
+            if last < 0 or start_times[dto] > stop_times[self.dtos[last]]:
+                last = index
+                continue
+            if keep_best:
+                last_dto = self.dtos[last]
+                # compares the ratios priority / memory without dividing by memories that may be zero
+                keeps_last = priorities[last_dto] * memories[dto] >= priorities[dto] * memories[last_dto]
+            else:
+                keeps_last = np.random.randint(2) == 0
+            if keeps_last:
+                removed.append(index)
+            else:
+                removed.append(last)
+                last = index
+        self.remove_dtos_at(removed)
 
     def repair_duplicates(self):
         """ Removes duplicate DTOs from the solution """
-        new_dtos: [DTO] = []
-        for dto in self.dtos:
-            index = binary_search(dto, new_dtos)
-            if index == -1:
-                new_dtos.append(dto)
-        self.dtos = new_dtos
+        # the plan is sorted, so duplicates are adjacent
+        dtos = np.array(self.dtos)
+        self.remove_dtos_at(np.flatnonzero(dtos[1:] == dtos[:-1]) + 1)
 
     def repair_satisfaction(self):
         """ Repairs the single satisfaction constraint of the solution """
-        ars_duplicate = [item for item, count in collections.Counter(self.get_ars_served()).items() if count > 1]
-
-        # for each AR that is served more than once, removes extra DTOs
-        for ar_id in ars_duplicate:
-            dtos_same_ar = [dto for dto in self.dtos if dto['ar_id'] == ar_id]
-            # removes the DTOs with same AR, except one
-            for dto in sample(dtos_same_ar, len(dtos_same_ar) - 1):
-                self.remove_dto(dto)
+        ar_indices = self.instance.ar_indices[self.dtos]
+        # positions of the DTOs whose AR is served more than once, in random order
+        positions = np.random.permutation(np.flatnonzero(self.ar_counts[ar_indices] > 1))
+        # for each AR keeps a random DTO, which is the first one of the AR in the shuffled positions
+        _, kept = np.unique(ar_indices[positions], return_index=True)
+        self.remove_dtos_at(np.delete(positions, kept))
 
     def update_downloaded_dtos(self):
-        memory: float = 0
+        """ Recomputes the DTOs downloaded by each DLO, downloading the largest DTOs first """
+        memories = self.instance.memories
+        segments = self.instance.dto_segments
         downloadable_dtos: [DTO] = []
 
-        for dlo in self.dlos:
-            dlo['downloaded_dtos'] = []
+        self.downloads = {}
+        self.downloaded_memories = np.zeros(self.instance.num_dlos)
 
-        for j, dlo in enumerate(self.dlos):
-            if j == 0:
-                dtos_between_dlos: [DTO] = self.get_dtos_between_dates(0, dlo['start_time'])
-            else:
-                dtos_between_dlos: [DTO] = self.get_dtos_between_dates(self.dlos[j - 1]['stop_time'], dlo['start_time'])
+        i: int = 0
+        for j in range(self.instance.num_dlos):
+            # the DTOs acquired before the DLO j become downloadable
+            while i < len(self.dtos) and segments[self.dtos[i]] <= j:
+                if i == 0 or self.dtos[i] != self.dtos[i - 1]:
+                    downloadable_dtos.append(self.dtos[i])
+                i += 1
 
-            memory = memory + sum(list(map(lambda dto_: dto_['memory'], dtos_between_dlos)))
-            downloadable_dtos += dtos_between_dlos
-            downloadable_dtos.sort(key=lambda dto_: dto_['memory'], reverse=True)
+            downloadable_dtos.sort(key=lambda dto_: memories[dto_], reverse=True)
             memory_downloaded: float = 0
-            i: int = 0
-            while i < len(downloadable_dtos):
-                dto = downloadable_dtos[i]
-                if DEBUG and self.is_dto_downloaded(dto):
-                    raise Exception('The DTO is already downloaded')
-
-                if self.is_dto_downloadable(dto, dlo, memory_downloaded):
-                    dlo['downloaded_dtos'].append(dto.copy())
-                    memory = memory - dto['memory']
-                    memory_downloaded += dto['memory']
-                    downloadable_dtos.remove(dto)
-                    i -= 1
-                i += 1
+            k: int = 0
+            while k < len(downloadable_dtos):
+                dto = downloadable_dtos[k]
+                if self.is_dto_downloadable(dto, j, memory_downloaded):
+                    self.downloads[dto] = j
+                    memory_downloaded += memories[dto]
+                    downloadable_dtos.pop(k)
+                    k -= 1
+                k += 1
+            self.downloaded_memories[j] = memory_downloaded
+
+        self.memory_levels = self.compute_memory_levels()
+        self.verified_constraints.pop(Constraint.MEMORY, None)
+
+    def mutate(self):
+        """ Replaces 5% of DTOs in the plan with new random DTOs """
+        for _ in range(len(self.dtos) // 20):
+            self.add_dto(randrange(self.instance.num_dtos))
+            self.remove_dto_at(randint(0, len(self.dtos) - 1))
+
+    def repair(self, keep_best: bool = False):
+        """ Repairs all the constraints which are not respected by the solution.
+            If keep_best is True, overlaps are repaired keeping the DTOs with higher priority per unit of memory """
+        size = self.size()
+        if not self.is_feasible(Constraint.OVERLAP):
+            self.repair_overlap(keep_best)
+        if not self.is_feasible(Constraint.SINGLE_SATISFACTION):
+            self.repair_satisfaction()
+        if not self.is_feasible(Constraint.DUPLICATES):
+            self.repair_duplicates()
+        if not self.is_feasible(Constraint.MEMORY):
+            self.repair_memory()
+        # the repairs only remove DTOs
+        counters[REPAIR_REMOVALS] += size - self.size()
+
+    def local_search(self, ordered_dtos: np.ndarray):
+        """ Tries to insert new DTOs in the plan, following the given order """
+        if self.instance.has_dlos():
+            ordered_dtos = ordered_dtos[:len(ordered_dtos) // 2]
+        # the DTOs overlapping the plan or of ARs already served are discarded at once with the conflict index,
+        # the insertions only add DTOs so they can never become insertable again
+        blocked = self.instance.find_conflicting(self.dtos) | self.ars_served[self.instance.ar_indices]
+        if not self.instance.has_dlos():
+            blocked |= self.instance.memories > self.capacity - self.tot_memory
+            candidates = ordered_dtos[~blocked[ordered_dtos]].tolist()
+            for dto in candidates:
+                if self.keeps_feasibility(dto):
+                    self.add_dto(dto)
+                    counters[INSERTION_SUCCESSES] += 1
+            counters[INSERTION_ATTEMPTS] += len(candidates)
+        else:
+            for dto in ordered_dtos[~blocked[ordered_dtos]].tolist():
+                self.add_and_download_dto(dto)
+
+    def get_plan(self) -> (np.ndarray, np.ndarray):
+        """ Returns a compact copy of the plan: the DTOs taken and the DLO that downloads each of them,
+            -1 if the DTO is not downloaded """
+        dtos = np.array(self.dtos, dtype=np.int32)
+        dlos = np.array([self.downloads.get(dto, -1) for dto in self.dtos], dtype=np.int32)
+        return dtos, dlos
+
+    @staticmethod
+    def from_plan(instance: ProblemInstance, dtos: np.ndarray, dlos: np.ndarray):
+        """ Creates a solution from a compact plan returned by get_plan """
+        chromosome = Chromosome(instance, dtos.tolist())
+        if instance.has_dlos():
+            chromosome.set_downloads(dlos)
+        return chromosome
+
+    def set_downloads(self, dlos: np.ndarray):
+        """ Sets the downloads of the plan, given the DLO that downloads each DTO (-1 if it is not downloaded) """
+        downloaded = np.flatnonzero(dlos >= 0)
+        dtos = np.array(self.dtos, dtype=np.int64)[downloaded]
+        self.downloads = dict(zip(dtos.tolist(), dlos[downloaded].tolist()))
+        self.downloaded_memories = np.bincount(dlos[downloaded], weights=self.instance.memories[dtos],
+                                               minlength=self.instance.num_dlos).astype(np.float64)
+        self.memory_levels = self.compute_memory_levels()
+        self.verified_constraints.pop(Constraint.MEMORY, None)
 
     def plot_memory(self):
         """ Shows the memory trend of the solution on a graph """
-        activities = self.dtos + self.dlos
-        activities = sorted(activities, key=lambda activity_: activity_['start_time'])
+        # DTOs are marked with 0 and DLOs with 1, so that activities with same start time keep a stable order
+        activities = [(self.instance.start_times[dto], 0, dto) for dto in self.dtos] + \
+                     [(start_time, 1, j) for j, start_time in enumerate(self.instance.dlo_start_times)]
+        activities = sorted(activities)
         memories = [0]
         current_memory: float = 0
-        for activity in activities:
-            if 'ar_id' in activity:
-                current_memory = current_memory + activity['memory']
+        for _, is_dlo, index in activities:
+            if not is_dlo:
+                current_memory = current_memory + self.instance.memories[index]
             else:
-                for dto in activity['downloaded_dtos']:
-                    current_memory = current_memory - dto['memory']
+                current_memory = current_memory - self.downloaded_memories[index]
             memories.append(current_memory)
 
         x = np.arange(len(activities) + 1)
@@ -423,4 +614,4 @@ class Chromosome:
 
     def __str__(self) -> str:
         return f'Fitness: {self.fitness},\nFeasible: {self.is_feasible()},\nMemory occupied: {self.tot_memory},' \
-               f'\nDTOs taken: {self.dtos[:5]}...,\nARs served: {self.ars_served[:5]}...'
+               f'\nDTOs taken: {self.get_dto_ids()[:5]}...,\nARs served: {self.ars_served[:5]}...'
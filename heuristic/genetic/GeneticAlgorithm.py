@@ -1,25 +1,60 @@
-from random import sample, choice, randint
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from random import sample
+from typing import AsyncIterator, Callable, Iterator, Optional
 
 import matplotlib.pyplot as plt
 import numpy as np
 
-from utils import Constraint
+from utils import Constraint, ProblemInstance
 from . import Chromosome
 from .crossover import Crossover
 from .crossover import MultiPointCrossover
 from .crossover import SinglePointCrossover
 from .crossover import OrderedCrossover
-from .my_types import DTO, DLO, DEBUG
-from .parent_selection import RouletteWheelSelection, ParentSelection
+from .instrumentation import counters
+from .my_types import DTO
+from .parent_selection import ParentSelection, RankSelection, RouletteWheelSelection, StochasticUniversalSampling, \
+    TournamentSelection
+from .PopulationMatrix import PopulationMatrix
+from .PopulationPool import PopulationPool
 
 
 class GeneticAlgorithm:
     """ Implements the structure and methods of a genetic algorithm to solve satellite optimization problem """
 
-    def __init__(self, capacity, total_dtos, total_ars, total_dlos=None, downlink_rate=None,
-                 num_generations=300, num_chromosomes=20, num_elites=3,
-                 parent_selection_strategy='roulette', crossover_strategy='ordered'):
-        """ Creates a random initial population and prepares data for the algorithm """
+    def __init__(self, instance: ProblemInstance, num_generations=300, num_chromosomes=20, num_elites=3,
+                 parent_selection_strategy='roulette', crossover_strategy='ordered', workers=1, verbose=False,
+                 trace_file=None, time_limit=None, stall_generations=None, target_fitness=None, target_gap=0.0,
+                 population_matrix=False, tournament_size=3, overlap_repair='random'):
+        """
+        Creates a random initial population and prepares data for the algorithm
+
+        :param instance: the problem instance, the memories of its DTOs are rounded to integers
+        :param num_generations: maximum number of generations, None for no limit
+        :param num_chromosomes: number of chromosomes of the population
+        :param num_elites: number of best chromosomes kept in the next generation
+        :param parent_selection_strategy: 'roulette', 'sus' (stochastic universal sampling), 'tournament' or 'rank'
+        :param tournament_size: number of chromosomes competing to be each parent with tournament selection
+        :param overlap_repair: which of two overlapping DTOs the repair removes, 'random' or 'best' to keep
+                               the one with higher priority per unit of memory
+        :param crossover_strategy: 'single', 'multi' or 'ordered'
+        :param workers: if greater than 1, the offspring of each generation is evolved by a pool of processes
+        :param verbose: if True, the fitness of each generation is printed
+        :param trace_file: if given, the statistics of each generation are appended to it as JSON lines
+        :param time_limit: maximum seconds of the run, checked at the end of each generation
+        :param stall_generations: stops after this number of generations without improvement of the best fitness
+        :param target_fitness: stops when the best fitness reaches target_fitness * (1 - target_gap),
+                               e.g. an upper bound of the optimal fitness
+        :param target_gap: fraction of the target fitness that can be missed, e.g. 0.01 for 1%
+        :param population_matrix: if True, the running sums of the chromosomes of the population are kept in the
+                                  rows of a PopulationMatrix, which evaluates the fitness of all of them at once
+        """
+        if num_generations is None and time_limit is None and stall_generations is None and target_fitness is None:
+            raise ValueError('Without a number of generations, a time limit, stall generations or a target fitness '
+                             'are required to stop the algorithm')
         if crossover_strategy == 'single':
             self.crossover_strategy: Crossover = SinglePointCrossover()
         elif crossover_strategy == 'multi':
@@ -29,31 +64,59 @@ class GeneticAlgorithm:
         else:
             raise ValueError(f'Invalid crossover strategy: {crossover_strategy}, choose from "single" or "multi"')
 
-        self.capacity = capacity
-        self.downlink_rate = downlink_rate
+        if overlap_repair not in ('random', 'best'):
+            raise ValueError(f'Invalid overlap repair: {overlap_repair}, choose from "random" or "best"')
+        self.keep_best: bool = overlap_repair == 'best'
+
+        if parent_selection_strategy == 'roulette':
+            self.parent_selection_strategy: ParentSelection = RouletteWheelSelection()
+        elif parent_selection_strategy == 'sus':
+            self.parent_selection_strategy: ParentSelection = StochasticUniversalSampling()
+        elif parent_selection_strategy == 'tournament':
+            self.parent_selection_strategy: ParentSelection = TournamentSelection(tournament_size)
+        elif parent_selection_strategy == 'rank':
+            self.parent_selection_strategy: ParentSelection = RankSelection()
+        else:
+            raise ValueError(f'Invalid parent selection strategy: {parent_selection_strategy}, choose from '
+                             f'"roulette", "sus", "tournament" or "rank"')
+
+        # the heuristic works on the memories rounded to integers
+        instance = instance.with_rounded_memories()
+        self.instance: ProblemInstance = instance
         self.num_elites = num_elites
-        print(f'Capacity: {capacity}')
-        self.total_dtos: [DTO] = total_dtos.copy()
-        for dto in self.total_dtos:
-            dto['memory']: int = round(dto['memory'])
-        self.total_ars: [DTO] = total_ars.copy()
-        self.total_dlos: [DLO] = []
-        if total_dlos is not None:
-            self.total_dlos = total_dlos.copy()
-            for dlo in self.total_dlos:
-                dlo['downloaded_dtos'] = []
-
-        self.ordered_dtos = sorted(total_dtos, key=lambda dto_: dto_['priority'], reverse=True)
-        self.num_generations: int = num_generations
+        self.verbose: bool = verbose
+        if verbose:
+            print(f'Capacity: {instance.capacity}')
+        self.total_dtos: [DTO] = list(range(instance.num_dtos))
+
+        # DTOs indexes sorted by priority, from the highest to the lowest
+        self.ordered_dtos: np.ndarray = np.argsort(-instance.priorities, kind='stable')
+        self.num_generations: Optional[int] = num_generations
+        self.time_limit: Optional[float] = time_limit
+        self.stall_generations: Optional[int] = stall_generations
+        self.target_fitness: Optional[float] = target_fitness
+        self.target_gap: float = target_gap
+        self.start_time: Optional[float] = None
+        self.start_generation: int = 0
+        # reason of the end of the last run: 'generations', 'time_limit', 'stall' or 'target'
+        self.termination_reason: Optional[str] = None
+        self.workers: int = workers
+        self.pool: Optional[PopulationPool] = None
         self.elites: [Chromosome] = []
         self.parents: [(Chromosome, Chromosome)] = []
         self.fitness_history: [float] = []
         self.population: [Chromosome] = []
+        self.population_matrix: Optional[PopulationMatrix] = PopulationMatrix(instance) if population_matrix else None
+        self.population_fitness: Optional[np.ndarray] = None
+
+        # statistics of each generation: seconds spent in each stage, increments of the counters and fitness
+        self.statistics: [dict] = []
+        self.stage_times: dict = {}
+        self.observers: [Callable[[dict], None]] = []
+        self.trace_file: Optional[str] = trace_file
 
         for i in range(num_chromosomes):
-            chromosome = Chromosome(self.capacity, total_ars.copy(),
-                                    tot_dlos=self.total_dlos,
-                                    downlink_rate=self.downlink_rate)
+            chromosome = Chromosome(self.instance)
             shuffled_dtos: [DTO] = sample(self.total_dtos, len(self.total_dtos))
 
             for dto in shuffled_dtos:
@@ -61,27 +124,40 @@ class GeneticAlgorithm:
                     chromosome.add_dto(dto)
 
             self.population.append(chromosome)
+        self.set_population(self.population)
 
-        if parent_selection_strategy == 'roulette':
-            self.parent_selection_strategy: ParentSelection = RouletteWheelSelection(self.population)
-        else:
-            raise ValueError(f'Invalid parent selection strategy: {parent_selection_strategy}, the only implemented '
-                             f'is roulette wheel')
+        # best plan found so far and generation in which it was found, the chromosomes are never changed
+        # once their generation is over, so the plan stays valid even after it leaves the population
+        self.best_solution: Chromosome = max(self.population, key=lambda chromosome: chromosome.get_fitness())
+        self.best_generation: int = 0
+
+    def set_population(self, population: [Chromosome]):
+        """ Replaces the population, the fitness evaluated on the previous one is discarded """
+        self.population = population
+        self.population_fitness = None
+        if self.population_matrix is not None:
+            self.population_matrix.set_population(population)
+
+    def get_population_fitness(self) -> np.ndarray:
+        """ Returns the fitness of each chromosome of the population, read from the population matrix
+            if it is enabled """
+        if self.population_fitness is None:
+            if self.population_matrix is not None:
+                self.population_fitness = self.population_matrix.get_fitness()
+            else:
+                self.population_fitness = np.array([chromosome.get_fitness() for chromosome in self.population])
+        return self.population_fitness
 
     def elitism(self):
         """ Updates the elites for the current generation """
-        self.elites = sorted(self.population,
-                             key=lambda chromosome: chromosome.get_fitness(),
-                             reverse=True)[:self.num_elites]
+        self.elites = self.get_elites(self.num_elites)
 
     def parent_selection(self):
-        """ Chooses and returns the chromosomes to make crossover with roulette wheel selection method """
-        self.parents = []
-        self.parent_selection_strategy = RouletteWheelSelection(self.population)
-        # finds number of couples equals to population length - elites length
-        for i in range(len(self.population) - len(self.elites)):
-            parents: (Chromosome, Chromosome) = self.parent_selection_strategy.select(self.population)
-            self.parents.append(parents)
+        """ Chooses the couples of chromosomes to make crossover with the parent selection strategy """
+        # finds number of couples equals to population length - elites length, all at once
+        pairs = self.parent_selection_strategy.select_pairs(self.get_population_fitness(),
+                                                            len(self.population) - len(self.elites))
+        self.parents = [(self.population[first], self.population[second]) for first, second in pairs.tolist()]
 
     def crossover(self):
         """ Makes crossover between each couple of parents, and replaces the entire population except
@@ -89,73 +165,174 @@ class GeneticAlgorithm:
         sons: [Chromosome] = []
         for parent1, parent2 in self.parents:
             son_dtos = self.crossover_strategy.crossover(parent1, parent2)
-            son = Chromosome(self.capacity, self.total_ars.copy(), son_dtos.copy(),
-                             self.total_dlos.copy(), self.downlink_rate)
+            son = Chromosome(self.instance, son_dtos)
             sons.append(son)
-            if DEBUG and not son.is_constraint_respected(Constraint.DUPLICATES):
-                raise Exception('The solution contains duplicates')
 
-        self.population = self.elites + sons
+        self.set_population(self.elites + sons)
 
     def mutation(self):
-        """ Mutates randomly the 10% of each chromosome in the population """
-        for chromosome in list(set(self.population) - set(self.elites)):
-            # Replaces 5% of DTOs in the plan with new random DTOs
-            for _ in range(len(chromosome.dtos) // 20):
-                new_dto = choice(self.total_dtos)
-                chromosome.add_dto(new_dto)
-                chromosome.remove_dto_at(randint(0, len(chromosome.dtos) - 1))
+        """ Mutates randomly the 5% of each chromosome in the population """
+        for chromosome in self.get_offspring():
+            chromosome.mutate()
 
     def update_downloaded_dtos(self):
-        for chromosome in list(set(self.population) - set(self.elites)):
+        for chromosome in self.get_offspring():
             chromosome.update_downloaded_dtos()
 
     def repair(self):
         """ Repairs the population if some chromosomes are not feasible """
         for chromosome in self.population:
-            if not chromosome.is_feasible(Constraint.OVERLAP):
-                chromosome.repair_overlap()
-            if not chromosome.is_feasible(Constraint.SINGLE_SATISFACTION):
-                chromosome.repair_satisfaction()
-            if not chromosome.is_feasible(Constraint.DUPLICATES):
-                chromosome.repair_duplicates()
-            if not chromosome.is_feasible(Constraint.MEMORY):
-                while not chromosome.repair_memory():
-                    chromosome.update_downloaded_dtos()
+            chromosome.repair(self.keep_best)
 
     def local_search(self):
         """ Performs local search on the population. Tries to insert new DTOs in the plan. """
-        for chromosome in list(set(self.population) - set(self.elites)):
+        for chromosome in self.get_offspring():
+            chromosome.local_search(self.ordered_dtos)
 
-            if len(self.total_dlos) == 0:
-                for dto in self.ordered_dtos:
-                    if chromosome.keeps_feasibility(dto):
-                        chromosome.add_dto(dto)
-            else:
-                dtos_to_insert = [dto for dto in self.ordered_dtos[:len(self.ordered_dtos) // 2]
-                                  if dto not in chromosome.dtos]
-                for dto in dtos_to_insert:
-                    chromosome.add_and_download_dto(dto)
+    def evolve_in_parallel(self):
+        """ Mutates, repairs and performs local search on the offspring with the pool of processes """
+        self.set_population(self.elites + self.pool.evolve(self.get_offspring()))
+
+    def get_offspring(self) -> [Chromosome]:
+        """ Returns the chromosomes of the population that are not elites, in the population order
+            so that runs with the same seed evolve the same way """
+        return [chromosome for chromosome in self.population if chromosome not in self.elites]
+
+    def add_observer(self, observer: Callable[[dict], None]):
+        """ Registers a function called at the end of each generation with the statistics of the generation """
+        self.observers.append(observer)
+
+    def run_stage(self, name: str, stage: Callable[[], None]):
+        """ Runs a stage of the generation and records how long it took """
+        start = time.perf_counter()
+        stage()
+        self.stage_times[name] = time.perf_counter() - start
+
+    def next_generation(self):
+        """ Evolves the population for one generation """
+        initial_counters = counters.copy()
+        self.stage_times = {}
+        self.run_stage('elitism', self.elitism)
+        self.run_stage('parent_selection', self.parent_selection)
+        self.run_stage('crossover', self.crossover)
+        if self.pool is not None:
+            self.run_stage('parallel_evolution', self.evolve_in_parallel)
+        else:
+            self.run_stage('mutation', self.mutation)
+            if self.instance.has_dlos():
+                self.run_stage('downlink_update', self.update_downloaded_dtos)
+            self.run_stage('repair', self.repair)
+            self.run_stage('local_search', self.local_search)
+        # mutation, repair and local search change the offspring in place
+        self.population_fitness = None
+        chromosome_fitness = self.get_population_fitness().tolist()
+        self.fitness_history.append(chromosome_fitness)
+        self.update_best_solution()
+
+        record = {'generation': len(self.fitness_history),
+                  'stage_times': self.stage_times,
+                  'counters': dict(counters - initial_counters),
+                  'best_fitness': max(chromosome_fitness),
+                  'mean_fitness': sum(chromosome_fitness) / len(chromosome_fitness)}
+        self.statistics.append(record)
+        for observer in self.observers:
+            observer(record)
+
+    def update_best_solution(self):
+        """ Replaces the best plan found so far if the population contains a better one """
+        best = self.population[np.argmax(self.get_population_fitness())]
+        if best.get_fitness() > self.best_solution.get_fitness():
+            self.best_solution = best
+            self.best_generation = len(self.fitness_history)
+
+    def check_termination(self) -> Optional[str]:
+        """ Returns the reason why the run must stop after the current generation, None if it must go on """
+        generation = len(self.fitness_history)
+        if self.target_fitness is not None and \
+                self.best_solution.get_fitness() >= self.target_fitness * (1 - self.target_gap):
+            return 'target'
+        if self.stall_generations is not None and generation - self.best_generation >= self.stall_generations:
+            return 'stall'
+        if self.time_limit is not None and time.perf_counter() - self.start_time >= self.time_limit:
+            return 'time_limit'
+        if self.num_generations is not None and generation - self.start_generation >= self.num_generations:
+            return 'generations'
+        return None
 
     def run(self):
-        """ Starts the algorithm itself """
-        for i in range(self.num_generations):
-            print(f'Generation {i + 1}')
-            self.elitism()
-            self.parent_selection()
-            self.crossover()
-            self.mutation()
-            if len(self.total_dlos) > 0:
-                self.update_downloaded_dtos()
-            self.repair()
-            self.local_search()
-            chromosome_fitness = [chromosome.get_fitness() for chromosome in self.population]
-            self.fitness_history.append(chromosome_fitness)
-            print(f'Fitness: {self.fitness_history[i]}')
+        """ Starts the algorithm itself, and evolves the population until one of the termination criteria is met """
+        for _ in self.iterate_solutions():
+            pass
+
+    def iterate_solutions(self) -> Iterator[Chromosome]:
+        """ Runs the algorithm as a generator, which yields the best plan of the initial population and then each
+            better plan as soon as a generation finds it. Stopping the iteration stops the run """
+        self.start_time = time.perf_counter()
+        self.start_generation = len(self.fitness_history)
+        self.termination_reason = None
+        if self.workers > 1:
+            self.pool = PopulationPool(self.instance, self.ordered_dtos, self.workers, self.keep_best)
+        trace = open(self.trace_file, 'a') if self.trace_file is not None else None
+        try:
+            best = self.get_best_solution()
+            yield best
+            self.termination_reason = self.check_termination()
+            while self.termination_reason is None:
+                if self.verbose:
+                    print(f'Generation {len(self.fitness_history) + 1}')
+                self.next_generation()
+                if self.verbose:
+                    print(f'Fitness: {self.fitness_history[-1]}')
+                if trace is not None:
+                    trace.write(json.dumps(self.statistics[-1]) + '\n')
+                if self.best_solution is not best:
+                    best = self.best_solution
+                    yield best
+                self.termination_reason = self.check_termination()
+            if self.verbose:
+                print(f'Stopped by {self.termination_reason} after {len(self.fitness_history)} generations')
+        finally:
+            if trace is not None:
+                trace.close()
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+
+    async def iterate_solutions_async(self) -> AsyncIterator[Chromosome]:
+        """ Asynchronous version of iterate_solutions, the generations run in a separate thread so that the event
+            loop is not blocked between two plans. With workers greater than 1 the heavy stages run in other
+            processes, otherwise they share the interpreter lock with the event loop """
+        loop = asyncio.get_running_loop()
+        solutions = self.iterate_solutions()
+        # a single thread, so that the generator is closed only after the generation in progress
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            while True:
+                solution = await loop.run_in_executor(executor, next, solutions, None)
+                if solution is None:
+                    break
+                yield solution
+        finally:
+            # the generator is closed by the thread itself, the event loop does not wait for the generation
+            # in progress when the iteration is cancelled
+            executor.submit(solutions.close)
+            executor.shutdown(wait=False)
+
+    def get_elites(self, number: int) -> [Chromosome]:
+        """ Returns the given number of best chromosomes of the population """
+        order = np.argsort(-self.get_population_fitness(), kind='stable')[:number]
+        return [self.population[i] for i in order.tolist()]
+
+    def immigrate(self, chromosomes: [Chromosome]):
+        """ Replaces the worst chromosomes of the population with the given ones """
+        survivors = self.get_elites(len(self.population) - len(chromosomes))
+        self.set_population(survivors + chromosomes)
 
     def get_best_solution(self) -> Chromosome:
-        """ Returns the best solution in the population after running of the algorithm """
-        return max(self.population, key=lambda chromosome: chromosome.get_fitness())
+        """ Returns the best solution found so far, it can be called at any point of the run
+            (e.g. by an observer) """
+        self.update_best_solution()
+        return self.best_solution
 
     def print_population(self):
         """ Prints all solutions and the relative info """
@@ -176,6 +353,6 @@ class GeneticAlgorithm:
         """ Plots how the fitness of each solution changes over the generations """
         history = np.array(self.fitness_history)
         for i in range(len(history[0, :])):
-            plt.plot(np.arange(0, self.num_generations), history[:, i])
+            plt.plot(np.arange(0, len(history)), history[:, i])
         plt.title('Fitness values - Generations')
         plt.show()
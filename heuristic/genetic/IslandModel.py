@@ -0,0 +1,112 @@
+import random
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+
+import numpy as np
+
+from utils import ProblemInstance
+from .Chromosome import Chromosome
+from .GeneticAlgorithm import GeneticAlgorithm
+
+
+def _run_island(connection: Connection, description: dict, seed: int, num_generations: int,
+                migration_interval: int, num_migrants: int, parameters: dict):
+    """ Evolves the population of an island, exchanging its elites with the other islands
+        every migration interval. At the end sends the best plan found and the fitness history """
+    random.seed(seed)
+    np.random.seed(seed)
+    instance, blocks = ProblemInstance.from_shared_memory(description)
+    ga = GeneticAlgorithm(instance, num_generations=num_generations, **parameters)
+
+    for generation in range(1, num_generations + 1):
+        ga.next_generation()
+        if generation % migration_interval == 0 and generation < num_generations:
+            connection.send([elite.get_plan() for elite in ga.get_elites(num_migrants)])
+            migrants = connection.recv()
+            # the migrants are built on the instance of the island, which has the rounded memories
+            ga.immigrate([Chromosome.from_plan(ga.instance, dtos, dlos) for dtos, dlos in migrants])
+
+    connection.send((ga.get_best_solution().get_plan(), ga.fitness_history))
+    connection.close()
+    for block in blocks:
+        block.close()
+
+
+class IslandModel:
+    """ Runs independent populations of GeneticAlgorithm class in separate processes (islands),
+        which periodically send their elites to the next island of a ring """
+
+    def __init__(self, instance: ProblemInstance, num_islands=4, num_generations=300, migration_interval=10,
+                 num_migrants=2, crossover_strategies=('single', 'multi', 'ordered'), **parameters):
+        """
+        Prepares the islands
+
+        :param instance: the problem instance
+        :param num_islands: number of islands, each one runs in its own process
+        :param num_generations: number of generations of each island
+        :param migration_interval: number of generations between two migrations
+        :param num_migrants: number of elites that each island sends to the next one
+        :param crossover_strategies: crossover strategies assigned to the islands in turn
+        :param parameters: other parameters of GeneticAlgorithm class, shared by all the islands
+        """
+        if num_migrants >= parameters.get('num_chromosomes', 20):
+            raise ValueError('The number of migrants must be lower than the number of chromosomes')
+        self.instance: ProblemInstance = instance
+        self.num_islands: int = num_islands
+        self.num_generations: int = num_generations
+        self.migration_interval: int = migration_interval
+        self.num_migrants: int = num_migrants
+        self.island_parameters: [dict] = [{**parameters,
+                                           'crossover_strategy': crossover_strategies[i % len(crossover_strategies)]}
+                                          for i in range(num_islands)]
+        self.best_solutions: [Chromosome] = []
+        self.fitness_histories: [[float]] = []
+
+    def run(self):
+        """ Starts the islands and exchanges the migrants until the end of the generations """
+        # the memories are rounded once, so that the islands and the best solutions share the same instance
+        self.instance = self.instance.with_rounded_memories()
+        # the conflict index is built once and shared with the islands
+        self.instance.build_conflict_index()
+        description, blocks = self.instance.to_shared_memory()
+        connections: [Connection] = []
+        processes: [Process] = []
+        try:
+            for parameters in self.island_parameters:
+                connection, island_connection = Pipe()
+                process = Process(target=_run_island,
+                                  args=(island_connection, description, random.getrandbits(32),
+                                        self.num_generations, self.migration_interval, self.num_migrants,
+                                        parameters))
+                process.start()
+                island_connection.close()
+                connections.append(connection)
+                processes.append(process)
+
+            num_migrations = (self.num_generations - 1) // self.migration_interval
+            for _ in range(num_migrations):
+                elites = [connection.recv() for connection in connections]
+                # each island receives the elites of the previous one in the ring
+                for i, connection in enumerate(connections):
+                    connection.send(elites[i - 1])
+
+            self.best_solutions = []
+            self.fitness_histories = []
+            for connection in connections:
+                (dtos, dlos), fitness_history = connection.recv()
+                self.best_solutions.append(Chromosome.from_plan(self.instance, dtos, dlos))
+                self.fitness_histories.append(fitness_history)
+
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def get_best_solution(self) -> Chromosome:
+        """ Returns the best solution found by all the islands after running of the algorithm """
+        return max(self.best_solutions, key=lambda chromosome: chromosome.get_fitness())
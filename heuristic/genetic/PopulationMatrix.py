@@ -0,0 +1,88 @@
+import numpy as np
+
+from utils import ProblemInstance
+from .Chromosome import Chromosome
+
+
+class PopulationMatrix:
+    """ The plans of a population as matrices with a row for each chromosome: the bits of the DTOs taken,
+        the number of DTOs taken for each AR, the memory acquired in each segment between two DLOs, fitness and
+        total memory. The running sums of each chromosome of the population are views of its rows, so add_dto
+        and discard_dto update the matrices in place and the whole population is evaluated with a few NumPy
+        operations, without visiting the chromosomes """
+
+    # running sums of Chromosome that are rows of the matrices
+    ROW_FIELDS = ('dto_bits', 'ar_counts', 'segment_memories', 'totals')
+
+    def __init__(self, instance: ProblemInstance) -> None:
+        """ Creates the matrices of an empty population """
+        self.instance: ProblemInstance = instance
+        self.matrices: {str: np.ndarray} = {}
+        self.allocate(0)
+        # chromosome of each row, None if the row is free, and rows of the population in its order
+        self.chromosomes: [Chromosome] = []
+        self.rows = np.zeros(0, dtype=np.int64)
+
+    def allocate(self, num_rows: int):
+        """ Allocates matrices with the given number of rows, the chromosomes must be released before """
+        template = Chromosome(self.instance)
+        self.matrices = {field: np.zeros((num_rows,) + getattr(template, field).shape,
+                                         dtype=getattr(template, field).dtype)
+                         for field in self.ROW_FIELDS}
+
+    def bind(self, chromosome: Chromosome, row: int):
+        """ Copies the running sums of the chromosome into the row and makes the chromosome work on it """
+        for field, matrix in self.matrices.items():
+            matrix[row] = getattr(chromosome, field)
+            setattr(chromosome, field, matrix[row])
+        self.chromosomes[row] = chromosome
+
+    def release(self, row: int):
+        """ Gives back to the chromosome of the row its own copy of the running sums, and frees the row """
+        chromosome = self.chromosomes[row]
+        for field, matrix in self.matrices.items():
+            setattr(chromosome, field, matrix[row].copy())
+        self.chromosomes[row] = None
+
+    def set_population(self, population: [Chromosome]):
+        """ Replaces the population. The chromosomes still in the population keep their rows,
+            only the new ones are copied into the rows left by the chromosomes that are no longer in it """
+        rows = {id(chromosome): row for row, chromosome in enumerate(self.chromosomes) if chromosome is not None}
+        kept = {id(chromosome) for chromosome in population}
+        for row, chromosome in enumerate(self.chromosomes):
+            if chromosome is not None and id(chromosome) not in kept:
+                self.release(row)
+                del rows[id(chromosome)]
+
+        new_chromosomes = {id(chromosome): chromosome for chromosome in population if id(chromosome) not in rows}
+        if len(rows) + len(new_chromosomes) > len(self.chromosomes):
+            # the population grew, every chromosome moves to the new matrices
+            for row in rows.values():
+                self.release(row)
+            new_chromosomes = {id(chromosome): chromosome for chromosome in population}
+            rows = {}
+            self.allocate(len(new_chromosomes))
+            self.chromosomes = [None] * len(new_chromosomes)
+
+        free_rows = iter([row for row, chromosome in enumerate(self.chromosomes) if chromosome is None])
+        for key, chromosome in new_chromosomes.items():
+            rows[key] = next(free_rows)
+            self.bind(chromosome, rows[key])
+        self.rows = np.array([rows[id(chromosome)] for chromosome in population], dtype=np.int64)
+
+    def get_fitness(self) -> np.ndarray:
+        """ Returns the fitness of each chromosome """
+        return self.matrices['totals'][self.rows, 0]
+
+    def get_tot_memories(self) -> np.ndarray:
+        """ Returns the total memory of the DTOs taken by each chromosome """
+        return self.matrices['totals'][self.rows, 1]
+
+    def get_ar_multiplicities(self) -> np.ndarray:
+        """ Returns how many DTOs of each AR are taken by each chromosome, with a column for each AR """
+        return self.matrices['ar_counts'][self.rows]
+
+    def get_segment_memories(self) -> np.ndarray:
+        """ Returns the memory of the DTOs taken by each chromosome in each segment between two DLOs,
+            the column j is the memory acquired right before the DLO j (the last one after the last DLO) """
+        return self.matrices['segment_memories'][self.rows]
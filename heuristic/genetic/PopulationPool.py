@@ -0,0 +1,81 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils import ProblemInstance
+from .Chromosome import Chromosome
+from .instrumentation import counters
+
+# state of each worker process, initialized once when the process starts
+_instance: ProblemInstance = None
+_blocks = []
+_ordered_dtos: np.ndarray = np.zeros(0, dtype=np.int32)
+_keep_best: bool = False
+
+
+def _init_worker(description: dict, ordered_dtos: np.ndarray, keep_best: bool):
+    """ Attaches the worker to the instance in shared memory """
+    global _instance, _blocks, _ordered_dtos, _keep_best
+    _instance, _blocks = ProblemInstance.from_shared_memory(description)
+    _ordered_dtos = ordered_dtos
+    _keep_best = keep_best
+
+
+def _evolve_plan(dtos: np.ndarray, seed: int) -> (np.ndarray, np.ndarray, dict):
+    """ Mutates, repairs and performs local search on a plan, returns the resulting plan
+        and the increments of the counters of the operations made """
+    random.seed(seed)
+    np.random.seed(seed)
+    initial_counters = counters.copy()
+    chromosome = Chromosome(_instance, dtos.tolist())
+    chromosome.mutate()
+    if _instance.has_dlos():
+        chromosome.update_downloaded_dtos()
+    chromosome.repair(_keep_best)
+    chromosome.local_search(_ordered_dtos)
+    return (*chromosome.get_plan(), dict(counters - initial_counters))
+
+
+class PopulationPool:
+    """ A pool of processes that evolves the chromosomes of a population in parallel.
+        The instance is shared once with every process, then only compact plans are exchanged """
+
+    def __init__(self, instance: ProblemInstance, ordered_dtos: np.ndarray, workers: int, keep_best: bool = False):
+        """ Starts the processes, keep_best is passed to the repair of the chromosomes """
+        self.instance: ProblemInstance = instance
+        # the conflict index is built before the instance is shared, so that the processes do not build their own
+        instance.build_conflict_index()
+        description, self.blocks = instance.to_shared_memory()
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                            initargs=(description, np.array(ordered_dtos, dtype=np.int32),
+                                                      keep_best))
+        self.workers: int = workers
+
+    def evolve(self, chromosomes: [Chromosome]) -> [Chromosome]:
+        """ Mutates, repairs and performs local search on each chromosome in a separate process,
+            returns the new chromosomes """
+        plans = [np.array(chromosome.dtos, dtype=np.int32) for chromosome in chromosomes]
+        # each plan has its own seed, otherwise the processes would share the same random sequence
+        seeds = [random.getrandbits(32) for _ in chromosomes]
+        chunk_size = max(1, len(plans) // (4 * self.workers))
+
+        evolved: [Chromosome] = []
+        for dtos, dlos, increments in self.executor.map(_evolve_plan, plans, seeds, chunksize=chunk_size):
+            evolved.append(Chromosome.from_plan(self.instance, dtos, dlos))
+            counters.update(increments)
+        return evolved
+
+    def close(self):
+        """ Stops the processes and releases the shared memory """
+        self.executor.shutdown()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,3 +1,6 @@
 from .my_types import *
 from .Chromosome import Chromosome
 from .GeneticAlgorithm import GeneticAlgorithm
+from .PopulationMatrix import PopulationMatrix
+from .PopulationPool import PopulationPool
+from .IslandModel import IslandModel
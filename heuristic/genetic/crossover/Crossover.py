@@ -1,10 +1,25 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
 
 from heuristic.genetic.Chromosome import Chromosome
+from heuristic.genetic.my_types import DTO
 
 
 class Crossover(ABC):
+    """ Crossovers work on the sorted DTO indexes of the parents and cut them at times found with binary searches,
+        so the DTOs of the son are sorted and do not overlap where the parts of the two parents meet """
 
     @abstractmethod
-    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [Chromosome]:
+    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [DTO]:
         pass
+
+
+def find_first_starting_after(parent: Chromosome, time: float) -> int:
+    """ Returns the position of the first DTO of the plan starting after the given time """
+    return bisect_right(parent.dtos, time, key=parent.instance.start_times.__getitem__)
+
+
+def find_first_stopping_from(parent: Chromosome, time: float) -> int:
+    """ Returns the position of the first DTO of the plan stopping at or after the given time.
+        The plan must have no overlapping DTOs, so that its stop times are sorted as well """
+    return bisect_left(parent.dtos, time, key=parent.instance.stop_times.__getitem__)
@@ -1,12 +1,20 @@
 from random import sample
 
 from heuristic.genetic.Chromosome import Chromosome
-from heuristic.genetic.crossover.Crossover import Crossover
+from heuristic.genetic.crossover.Crossover import Crossover, find_first_starting_after, find_first_stopping_from
+from heuristic.genetic.my_types import DTO
 
 
 class MultiPointCrossover(Crossover):
+    """ Replaces the DTOs of the first parent between two random points with the DTOs of the second parent
+        that fit in the gap they leave """
 
-    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [Chromosome]:
+    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [DTO]:
+        if len(parent1.dtos) < 2:
+            return list(parent1.dtos)
         rand1, rand2 = sample(range(0, len(parent1.dtos)), 2)
         i1, i2 = (rand1, rand2) if rand1 <= rand2 else (rand2, rand1)
-        return parent1.dtos[:i1] + parent2.dtos[i1:i2] + parent1.dtos[i2:]
+        instance = parent1.instance
+        first = find_first_starting_after(parent2, instance.stop_times[parent1.dtos[i1 - 1]]) if i1 > 0 else 0
+        last = find_first_stopping_from(parent2, instance.start_times[parent1.dtos[i2]])
+        return parent1.dtos[:i1] + parent2.dtos[first:max(first, last)] + parent1.dtos[i2:]
@@ -1,16 +1,17 @@
 from random import choice
 
 from heuristic.genetic.Chromosome import Chromosome
-from heuristic.genetic.crossover.Crossover import Crossover
+from heuristic.genetic.crossover.Crossover import Crossover, find_first_starting_after
+from heuristic.genetic.my_types import DTO
 
 
 class OrderedCrossover(Crossover):
+    """ Takes the DTOs of the first parent before a random DTO, and the DTOs of the second parent starting
+        after the end of that DTO """
 
-    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [Chromosome]:
+    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [DTO]:
+        if len(parent1.dtos) == 0:
+            return list(parent2.dtos)
         random = choice(range(0, len(parent1.dtos)))
-        stop_time = parent1.dtos[random]['stop_time']
-
-        i = 0
-        while i < len(parent2.dtos) and parent2.dtos[i]['start_time'] <= stop_time:
-            i += 1
-        return parent1.dtos[:random] + parent2.dtos[i:]
+        stop_time = parent1.instance.stop_times[parent1.dtos[random]]
+        return parent1.dtos[:random] + parent2.dtos[find_first_starting_after(parent2, stop_time):]
@@ -1,11 +1,19 @@
 import numpy as np
 
 from heuristic.genetic.Chromosome import Chromosome
-from heuristic.genetic.crossover.Crossover import Crossover
+from heuristic.genetic.crossover.Crossover import Crossover, find_first_starting_after
+from heuristic.genetic.my_types import DTO
 
 
 class SinglePointCrossover(Crossover):
+    """ Takes the DTOs of the first parent before a random point, and the DTOs of the second parent
+        starting after the last one taken """
 
-    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [Chromosome]:
+    def crossover(self, parent1: Chromosome, parent2: Chromosome) -> [DTO]:
+        if len(parent1.dtos) == 0:
+            return list(parent2.dtos)
         index = np.random.randint(0, len(parent1.dtos))
-        return parent1.dtos[:index] + parent2.dtos[index:]
+        if index == 0:
+            return list(parent2.dtos)
+        cut = find_first_starting_after(parent2, parent1.instance.stop_times[parent1.dtos[index - 1]])
+        return parent1.dtos[:index] + parent2.dtos[cut:]
@@ -0,0 +1,11 @@
+from collections import Counter
+
+# names of the counters
+REPAIR_REMOVALS = 'repair_removals'
+INSERTION_ATTEMPTS = 'insertion_attempts'
+INSERTION_SUCCESSES = 'insertion_successes'
+FEASIBILITY_CHECKS = 'feasibility_checks'
+
+# counters of the operations made by the chromosomes of this process.
+# GeneticAlgorithm reads how much they grow in each generation, worker processes send back their increments
+counters = Counter()
@@ -1,7 +1,9 @@
 from typing import TypeVar
 
-DTO = TypeVar("DTO")
-DLO = TypeVar("DLO")
+# DTOs and DLOs are referenced by their index in the problem instance
+DTO = int
+DLO = int
 AR = TypeVar("AR")
 
-DEBUG = True
+# if True, the whole plan is checked after each insertion, which is meant for the tests only
+DEBUG = False
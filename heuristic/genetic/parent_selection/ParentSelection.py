@@ -1,10 +1,20 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from heuristic.genetic.Chromosome import Chromosome
 
 
 class ParentSelection(ABC):
 
     @abstractmethod
-    def select(self, population: [Chromosome]) -> (Chromosome, Chromosome):
+    def select_pairs(self, fitness: np.ndarray, num_pairs: int) -> np.ndarray:
+        """ Draws all the couples of parents of a generation at once, given the fitness of each chromosome.
+            Returns an array with a row for each couple and the indexes of the two parents in the population """
         pass
+
+    def select(self, population: [Chromosome]) -> (Chromosome, Chromosome):
+        """ Draws a single couple of parents from the population """
+        fitness = np.array([chromosome.get_fitness() for chromosome in population])
+        first, second = self.select_pairs(fitness, 1)[0].tolist()
+        return population[first], population[second]
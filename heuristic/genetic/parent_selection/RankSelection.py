@@ -0,0 +1,17 @@
+import numpy as np
+
+from heuristic.genetic.parent_selection.ParentSelection import ParentSelection
+
+
+class RankSelection(ParentSelection):
+    """ Picks the parents with probability proportional to their rank in the population, from 1 for the worst
+        chromosome to the population size for the best one, so that the selection does not depend on the scale
+        of the fitness """
+
+    def select_pairs(self, fitness: np.ndarray, num_pairs: int) -> np.ndarray:
+        ranks = np.empty(len(fitness))
+        ranks[np.argsort(fitness, kind='stable')] = np.arange(1, len(fitness) + 1)
+        cumulative_ranks = np.cumsum(ranks)
+        points = np.random.random(2 * num_pairs) * cumulative_ranks[-1]
+        parents = np.minimum(np.searchsorted(cumulative_ranks, points, side='right'), len(fitness) - 1)
+        return parents.reshape(num_pairs, 2)
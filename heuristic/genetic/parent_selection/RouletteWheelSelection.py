@@ -1,20 +1,19 @@
-from random import choices, randint
+import numpy as np
 
-from heuristic.genetic.Chromosome import Chromosome
 from heuristic.genetic.parent_selection.ParentSelection import ParentSelection
 
 
 class RouletteWheelSelection(ParentSelection):
+    """ Picks the first parent with probability proportional to its fitness, and the second one randomly
+        within the population """
 
-    def __init__(self, population: [Chromosome]):
-        tot_fitness = sum([chromosome.get_fitness() for chromosome in population])
-        self.selection_probs = [chromosome.get_fitness() / tot_fitness
-                                for chromosome in population]
-
-    def select(self, population: [Chromosome]) -> (Chromosome, Chromosome):
-        # picks the first parent based on fitness (roulette wheel method)
-        parent1 = choices(population, weights=self.selection_probs, k=1)[0]
-
-        # picks the second parent randomly within the population
-        parent2 = population[randint(0, len(population) - 1)]
-        return parent1, parent2
+    def select_pairs(self, fitness: np.ndarray, num_pairs: int) -> np.ndarray:
+        cumulative_fitness = np.cumsum(fitness)
+        if len(fitness) == 0 or cumulative_fitness[-1] <= 0:
+            firsts = np.random.randint(len(fitness), size=num_pairs)
+        else:
+            # each point of the wheel falls in the slice of the chromosome whose cumulative fitness first exceeds it
+            points = np.random.random(num_pairs) * cumulative_fitness[-1]
+            firsts = np.minimum(np.searchsorted(cumulative_fitness, points, side='right'), len(fitness) - 1)
+        seconds = np.random.randint(len(fitness), size=num_pairs)
+        return np.column_stack((firsts, seconds))
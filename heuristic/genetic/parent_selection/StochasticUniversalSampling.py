@@ -0,0 +1,20 @@
+import numpy as np
+
+from heuristic.genetic.parent_selection.ParentSelection import ParentSelection
+
+
+class StochasticUniversalSampling(ParentSelection):
+    """ Picks all the parents with probability proportional to their fitness, with equally spaced points on the
+        wheel and a single random offset, so that the number of times a chromosome is picked is close to its
+        expected value. The parents are then coupled randomly """
+
+    def select_pairs(self, fitness: np.ndarray, num_pairs: int) -> np.ndarray:
+        num_parents = 2 * num_pairs
+        cumulative_fitness = np.cumsum(fitness)
+        if len(fitness) == 0 or cumulative_fitness[-1] <= 0:
+            parents = np.random.randint(len(fitness), size=num_parents)
+        else:
+            spacing = cumulative_fitness[-1] / num_parents
+            points = (np.random.random() + np.arange(num_parents)) * spacing
+            parents = np.minimum(np.searchsorted(cumulative_fitness, points, side='right'), len(fitness) - 1)
+        return np.random.permutation(parents).reshape(num_pairs, 2)
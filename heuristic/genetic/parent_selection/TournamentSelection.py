@@ -0,0 +1,18 @@
+import numpy as np
+
+from heuristic.genetic.parent_selection.ParentSelection import ParentSelection
+
+
+class TournamentSelection(ParentSelection):
+    """ Picks each parent as the best of a given number of chromosomes drawn randomly """
+
+    def __init__(self, size: int = 3):
+        if size < 1:
+            raise ValueError('The tournament size must be at least 1')
+        self.size: int = size
+
+    def select_pairs(self, fitness: np.ndarray, num_pairs: int) -> np.ndarray:
+        # a tournament for each parent, as a row of contestants
+        contestants = np.random.randint(len(fitness), size=(2 * num_pairs, self.size))
+        winners = contestants[np.arange(len(contestants)), np.argmax(fitness[contestants], axis=1)]
+        return winners.reshape(num_pairs, 2)
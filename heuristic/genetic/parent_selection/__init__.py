@@ -1 +1,5 @@
+from .ParentSelection import ParentSelection
 from .RouletteWheelSelection import RouletteWheelSelection
+from .StochasticUniversalSampling import StochasticUniversalSampling
+from .TournamentSelection import TournamentSelection
+from .RankSelection import RankSelection
@@ -3,39 +3,16 @@ import time
 import matplotlib.pyplot as plt
 
 from genetic import GeneticAlgorithm
-from utils.functions import load_instance, overlap, add_dummy_dlo
+from utils.functions import load_columns, prepare_instance
 
 if __name__ == '__main__':
-    dtos, ars, constants, paws = load_instance('day1_0')[:4]
-
-    # get rid of dtos overlapping with paws
-    filtered_dtos = []
-    for dto in dtos:
-        skip = False
-        for event in paws:
-            if overlap(dto, event):
-                skip = True
-                break
-        if not skip:
-            filtered_dtos.append(dto)
-
-    dtos = filtered_dtos
-
-    CAPACITY: float = constants['MEMORY_CAP']
-    DTOS_NUMBER: int = len(dtos)
-
-    for i, ar in enumerate(ars):
-        ar['index'] = i
-
-    for i, dto in enumerate(dtos):
-        dto['priority'] = next((ar['rank'] for ar in ars if ar['id'] == dto['ar_id']), None)
-        dto['ar_index'] = next((ar['index'] for ar in ars if ar['id'] == dto['ar_id']), None)
+    instance = prepare_instance(*load_columns('day1_0')[:4])
 
     partial_results = []
     for i in range(10):
         print(f'Run Test Partial {i + 1}')
         start = time.time()
-        ga = GeneticAlgorithm(CAPACITY, dtos, ars)
+        ga = GeneticAlgorithm(instance)
         ga.run()
         end = time.time()
         solution = ga.get_best_solution().fitness
@@ -43,43 +20,13 @@ if __name__ == '__main__':
         print(f'Run {i + 1} Result: {solution} in {end - start} seconds')
 
 
-    INSTANCE = 'day1_40'
-    dtos, ars, constants, paws, dlos = load_instance(INSTANCE)
-
-    initial_dlos = dlos
-
-    # get rid of dtos overlapping with paws and dlos
-    filtered_dtos = []
-    for dto in dtos:
-        skip = False
-        for event in paws + dlos:
-            if overlap(dto, event):
-                skip = True
-                break
-        if not skip:
-            filtered_dtos.append(dto)
-
-    dtos = sorted(filtered_dtos, key=lambda dto_: dto_['start_time'])
-    dlos = sorted(dlos, key=lambda dlo_: dlo_['start_time'])
-
-    # add the dummy variable for the correct
-    dlos = add_dummy_dlo(dtos, dlos)
-
-    CAPACITY = constants['MEMORY_CAP']
-    DOWNLINK_RATE = constants['DOWNLINK_RATE']
-
-    for i, ar in enumerate(ars):
-        ar['index'] = i
-
-    for i, dto in enumerate(dtos):
-        dto['priority'] = next((ar['rank'] for ar in ars if ar['id'] == dto['ar_id']), None)
-        dto['ar_index'] = next((ar['index'] for ar in ars if ar['id'] == dto['ar_id']), None)
+    instance = prepare_instance(*load_columns('day1_40'))
 
     complete_results = []
     for i in range(10):
         print(f'Run Test Complete {i + 1}')
         start = time.time()
-        ga = GeneticAlgorithm(CAPACITY, dtos, ars, dlos, DOWNLINK_RATE)
+        ga = GeneticAlgorithm(instance)
         ga.run()
         end = time.time()
         solution = ga.get_best_solution().fitness
@@ -0,0 +1,9 @@
+import pytest
+
+from heuristic.genetic import my_types
+
+
+@pytest.fixture(autouse=True)
+def check_insertions(monkeypatch):
+    """ Checks the whole plan after each insertion of the chromosomes """
+    monkeypatch.setattr(my_types, 'DEBUG', True)
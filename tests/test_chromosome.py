@@ -0,0 +1,50 @@
+import numpy as np
+
+from heuristic.genetic import Chromosome
+from utils import Constraint
+from utils.functions import load_columns, prepare_instance
+
+
+def load_complete_instance():
+    return prepare_instance(*load_columns('test_complete'))
+
+
+def test_repair_of_chromosome_built_empty():
+    """ An empty chromosome gets its memory profile from an empty plan, the bulk removals of the repair
+        must be able to update it in place """
+    instance = load_complete_instance()
+    chromosome = Chromosome(instance)
+    first = 0
+    second = next(dto for dto in range(1, instance.num_dtos)
+                  if instance.overlap(first, dto) and instance.ar_indices[dto] != instance.ar_indices[first])
+    chromosome.add_dto(first)
+    chromosome.add_dto(second)
+
+    chromosome.repair()
+
+    assert chromosome.size() == 1
+    assert chromosome.is_feasible(Constraint.OVERLAP)
+    assert chromosome.memory_levels.dtype == np.float64
+    assert np.allclose(chromosome.memory_levels, chromosome.compute_memory_levels())
+
+
+def test_duplicated_dtos_of_crossover():
+    """ The copies of a DTO beyond the first one are counted apart, the DTO stays in the bitset of the plan
+        until its last copy is removed """
+    instance = load_complete_instance()
+    chromosome = Chromosome(instance, [3, 1, 3, 3])
+
+    assert chromosome.duplicates == {3: 2}
+    assert not chromosome.is_constraint_respected(Constraint.DUPLICATES)
+
+    chromosome.remove_dto(3)
+    chromosome.remove_dto(3)
+
+    assert chromosome.has_dto(3)
+    assert chromosome.is_constraint_respected(Constraint.DUPLICATES)
+
+    chromosome.remove_dto(3)
+
+    assert not chromosome.has_dto(3)
+    assert chromosome.has_dto(1)
+    assert not chromosome.remove_dto(3)
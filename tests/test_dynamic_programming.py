@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from ILP.backends import HighsBackend
+from ILP.dynamic_programming import solve_partial_problem
+from ILP.model_builder import build_partial_model
+from utils.functions import build_instance
+
+
+def generate_partial_instance(seed: int, num_dtos: int = 40, num_ars: int = 12):
+    """ A random partial instance with overlapping DTOs, ARs with several DTOs and a tight memory """
+    rng = np.random.default_rng(seed)
+    start_times = np.sort(rng.uniform(0, 1000, num_dtos))
+    dtos = {'id': np.arange(num_dtos), 'ar_id': rng.integers(0, num_ars, num_dtos),
+            'start_time': start_times, 'stop_time': start_times + rng.uniform(5, 60, num_dtos),
+            'memory': rng.integers(1, 10, num_dtos)}
+    ars = {'id': np.arange(num_ars), 'rank': rng.integers(1, 20, num_ars)}
+    return build_instance(dtos, ars, {'MEMORY_CAP': 30})
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_solve_partial_problem(seed):
+    """ The plan is feasible and both its fitness and the upper bound are the optimal value found by HiGHS """
+    instance = generate_partial_instance(seed)
+
+    plan, upper_bound = solve_partial_problem(instance)
+    solution = HighsBackend().solve(build_partial_model(instance), verbose=False)
+
+    assert solution.is_optimal()
+    assert plan.is_feasible()
+    assert plan.get_fitness() == pytest.approx(solution.objective)
+    assert upper_bound == pytest.approx(solution.objective)
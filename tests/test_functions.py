@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from utils import functions
+from utils.functions import load_columns, prepare_instance, stream_instance
+
+INSTANCES = ['test_partial', 'test_complete', 'test_large_partial', 'test_large_complete']
+
+
+def assert_same_instance(streamed, loaded):
+    for name, value in vars(loaded).items():
+        if isinstance(value, np.ndarray):
+            assert np.array_equal(getattr(streamed, name), value), name
+            assert getattr(streamed, name).dtype == value.dtype, name
+        else:
+            assert getattr(streamed, name) == value, name
+
+
+def load_prepared(instance: str, downlinks: bool):
+    columns = load_columns(instance, cache=False)
+    return prepare_instance(*(columns if downlinks else columns[:4]))
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1 << 20])
+@pytest.mark.parametrize('instance', INSTANCES)
+def test_stream_instance(instance, chunk_size):
+    """ Streaming the DTOs gives the same instance as loading the whole files, whatever the chunk size """
+    downlinks = instance.endswith('complete')
+    assert_same_instance(stream_instance(instance, downlinks, chunk_size), load_prepared(instance, downlinks))
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1 << 20])
+def test_stream_instance_with_fractional_memory(tmp_path, monkeypatch, chunk_size):
+    """ The memories read as integers are converted when a fractional one is found """
+    directory = tmp_path / 'fractional'
+    shutil.copytree(functions.get_instance_directory('test_complete'), directory)
+    with open(directory / 'DTOs.json') as file:
+        dtos = json.load(file)
+    dtos[-1]['memory'] += 0.5
+    with open(directory / 'DTOs.json', 'w') as file:
+        json.dump(dtos, file)
+    if os.path.exists(directory / functions.CACHE_FILE):
+        os.remove(directory / functions.CACHE_FILE)
+    monkeypatch.setattr(functions, 'get_instance_directory', lambda instance: str(tmp_path / instance))
+
+    streamed = stream_instance('fractional', True, chunk_size)
+    loaded = load_prepared('fractional', True)
+
+    assert streamed.memories.dtype == np.float64
+    assert not np.array_equal(streamed.memories, np.round(streamed.memories))
+    assert_same_instance(streamed, loaded)
@@ -0,0 +1,49 @@
+import numpy as np
+
+from heuristic.genetic import Chromosome, PopulationMatrix
+from utils.functions import load_columns, prepare_instance
+
+
+def load_complete_instance():
+    return prepare_instance(*load_columns('test_complete'))
+
+
+def assert_rows_match(matrix, population):
+    assert np.array_equal(matrix.get_fitness(), [chromosome.get_fitness() for chromosome in population])
+    assert np.array_equal(matrix.get_tot_memories(), [chromosome.get_tot_memory() for chromosome in population])
+    assert np.array_equal(matrix.get_ar_multiplicities(), [chromosome.ar_counts for chromosome in population])
+    assert np.array_equal(matrix.get_segment_memories(),
+                          [chromosome.segment_memories for chromosome in population])
+
+
+def test_rows_follow_the_chromosomes():
+    """ The changes of the chromosomes of the population are seen by the matrix without copying them again """
+    instance = load_complete_instance()
+    population = [Chromosome(instance, [0, 5, 9]), Chromosome(instance, [2, 3]), Chromosome(instance)]
+    matrix = PopulationMatrix(instance)
+    matrix.set_population(population)
+    assert_rows_match(matrix, population)
+
+    population[0].remove_dto(5)
+    population[2].add_dto(7)
+    population[1].repair()
+
+    assert_rows_match(matrix, population)
+
+
+def test_chromosomes_leaving_the_population_keep_their_sums():
+    """ A chromosome no longer in the population gets its own copy of the row, which is given to a new one """
+    instance = load_complete_instance()
+    kept, leaving = Chromosome(instance, [0, 5]), Chromosome(instance, [2, 3])
+    matrix = PopulationMatrix(instance)
+    matrix.set_population([kept, leaving])
+    fitness = leaving.get_fitness()
+
+    arriving = Chromosome(instance, [11, 20])
+    population = [arriving, kept]
+    matrix.set_population(population)
+    arriving.add_dto(40)
+
+    assert leaving.get_fitness() == fitness
+    assert leaving.get_fitness() == instance.priorities[leaving.dtos].sum()
+    assert_rows_match(matrix, population)
@@ -0,0 +1,196 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from generator import InstanceBuilder
+from heuristic.genetic import GeneticAlgorithm
+from utils.functions import get_instance_directory, load_columns, prepare_instance
+
+BUNDLED_INSTANCES = ('test_partial', 'test_complete', 'test_large_partial', 'test_large_complete')
+
+# generated instances of growing size, built with a fixed seed so that every run sees the same instance
+TIERS = {
+    'partial_10k': dict(ars=1000, dto_per_ar=10, hours=6, memory_cap=2000, downlink_rate=None, paws=50, dlos=0),
+    'complete_10k': dict(ars=1000, dto_per_ar=10, hours=6, memory_cap=100, downlink_rate=0.6, paws=50, dlos=50),
+    'partial_100k': dict(ars=10000, dto_per_ar=10, hours=48, memory_cap=20000, downlink_rate=None, paws=400, dlos=0),
+    'complete_100k': dict(ars=10000, dto_per_ar=10, hours=48, memory_cap=1000, downlink_rate=0.6, paws=400,
+                          dlos=400),
+    'complete_1m': dict(ars=100000, dto_per_ar=10, hours=24 * 7, memory_cap=10000, downlink_rate=0.6, paws=2000,
+                        dlos=2000),
+}
+TIER_SEED = 0
+
+
+def load_benchmark_instance(name: str):
+    """ Returns the prepared problem instance of a bundled instance or of a generated tier """
+    if name in TIERS:
+        tier = TIERS[name]
+        builder = InstanceBuilder(name, datetime(2020, 10, 11, 12, 20, 30), timedelta(hours=tier['hours']),
+                                  seed=TIER_SEED) \
+            .generate_constants(tier['memory_cap'], tier['downlink_rate']) \
+            .generate_ars_and_dtos(tier['ars'], tier['dto_per_ar'], 5, 30, 70) \
+            .generate_paws(tier['paws'])
+        if tier['dlos'] > 0:
+            builder.generate_dlos(tier['dlos'])
+        dtos, ars, constants, paws, dlos = builder.get_instance().get_columns()
+    else:
+        dtos, ars, constants, paws, dlos = load_columns(name)
+    return prepare_instance(dtos, ars, constants, paws, dlos if 'DOWNLINK_RATE' in constants else None)
+
+
+def load_optimum(name: str):
+    """ Returns the optimal objective found by the ILP for the instance, None if it was never solved """
+    path = os.path.join(get_instance_directory(name), 'result.json') if name not in TIERS else None
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)['SolutionInfo']['ObjVal']
+
+
+def run_case(case: dict) -> dict:
+    """ Runs the genetic algorithm once on a case of the matrix, in a fresh process, and measures it """
+    random.seed(case['seed'])
+    np.random.seed(case['seed'])
+    times = {}
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        instance = load_benchmark_instance(case['instance'])
+        times['load'] = time.perf_counter() - start
+
+        stage_start = time.perf_counter()
+        ga = GeneticAlgorithm(instance, num_generations=case['num_generations'],
+                              num_chromosomes=case['num_chromosomes'], num_elites=case['num_elites'],
+                              crossover_strategy=case['crossover_strategy'],
+                              parent_selection_strategy=case['parent_selection_strategy'])
+        times['initialization'] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        ga.run()
+        times['evolution'] = time.perf_counter() - stage_start
+
+    # seconds spent in each stage of the generations and number of operations made by the chromosomes
+    for record in ga.statistics:
+        for stage, seconds in record['stage_times'].items():
+            times[stage] = times.get(stage, 0) + seconds
+    operations = {}
+    for record in ga.statistics:
+        for name, count in record['counters'].items():
+            operations[name] = operations.get(name, 0) + count
+
+    best = ga.get_best_solution()
+    optimum = load_optimum(case['instance'])
+    return {**case,
+            'num_dtos': instance.num_dtos,
+            'num_dlos': instance.num_dlos,
+            'wall_time': time.perf_counter() - start,
+            'stage_times': times,
+            'counters': operations,
+            # kilobytes on Linux, each case runs in its own process so this is the peak of the case alone
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'best_fitness': best.get_fitness(),
+            'mean_fitness': statistics.fmean(chromosome.get_fitness() for chromosome in ga.population),
+            'feasible': best.is_feasible(),
+            'optimum': optimum,
+            'gap': None if not optimum else (optimum - best.get_fitness()) / optimum}
+
+
+def summarize(runs: [dict]) -> [dict]:
+    """ Aggregates the repetitions of each configuration """
+    def configuration(run: dict) -> tuple:
+        return run['instance'], run['crossover_strategy'], run['parent_selection_strategy'], run['num_generations'], \
+            run['num_chromosomes'], run['num_elites']
+
+    summary = []
+    for key, group in itertools.groupby(sorted(runs, key=configuration), key=configuration):
+        group = list(group)
+        best_fitness = [run['best_fitness'] for run in group]
+        wall_times = [run['wall_time'] for run in group]
+        gaps = [run['gap'] for run in group if run['gap'] is not None]
+        summary.append({'instance': key[0], 'crossover_strategy': key[1], 'parent_selection_strategy': key[2],
+                        'num_generations': key[3], 'num_chromosomes': key[4], 'num_elites': key[5],
+                        'repetitions': len(group),
+                        'best_fitness': max(best_fitness),
+                        'mean_best_fitness': statistics.fmean(best_fitness),
+                        'stdev_best_fitness': statistics.pstdev(best_fitness),
+                        'mean_fitness': statistics.fmean(run['mean_fitness'] for run in group),
+                        'mean_wall_time': statistics.fmean(wall_times),
+                        'stdev_wall_time': statistics.pstdev(wall_times),
+                        'mean_stage_times': {stage: statistics.fmean(run['stage_times'].get(stage, 0)
+                                                                     for run in group)
+                                             for stage in group[0]['stage_times']},
+                        'peak_rss_kb': max(run['peak_rss_kb'] for run in group),
+                        'all_feasible': all(run['feasible'] for run in group),
+                        'mean_gap': statistics.fmean(gaps) if gaps else None})
+    return summary
+
+
+def get_commit() -> str:
+    """ Returns the current git commit of the repository, None outside a repository """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the genetic algorithm on a matrix of instances and '
+                                                 'parameters, and writes the results as JSON')
+    parser.add_argument('--instances', nargs='+', default=list(BUNDLED_INSTANCES),
+                        help=f'bundled instances or generated tiers among {list(TIERS)}')
+    parser.add_argument('--crossovers', nargs='+', default=['single', 'multi', 'ordered'])
+    parser.add_argument('--selections', nargs='+', default=['roulette'],
+                        help='parent selection strategies among roulette, sus, tournament and rank')
+    parser.add_argument('--generations', nargs='+', type=int, default=[50])
+    parser.add_argument('--chromosomes', nargs='+', type=int, default=[20])
+    parser.add_argument('--elites', nargs='+', type=int, default=[3])
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first repetition, the next ones follow')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default='benchmark.json')
+    arguments = parser.parse_args()
+
+    # the same seeds are used for every configuration, so that they are compared on the same random draws
+    cases = [{'instance': instance, 'crossover_strategy': crossover, 'parent_selection_strategy': selection,
+              'num_generations': generations, 'num_chromosomes': chromosomes, 'num_elites': elites,
+              'repetition': repetition, 'seed': arguments.seed + repetition}
+             for instance, crossover, selection, generations, chromosomes, elites, repetition
+             in itertools.product(arguments.instances, arguments.crossovers, arguments.selections,
+                                  arguments.generations, arguments.chromosomes, arguments.elites,
+                                  range(arguments.repetitions))]
+
+    start = time.perf_counter()
+    runs = []
+    # each case runs in a new process, so that the peak memory of a case is not inherited by the next one
+    with ProcessPoolExecutor(max_workers=arguments.workers, max_tasks_per_child=1) as executor:
+        for run in executor.map(run_case, cases):
+            runs.append(run)
+            print(f"{run['instance']} {run['crossover_strategy']} {run['parent_selection_strategy']} "
+                  f"repetition {run['repetition']}: "
+                  f"fitness {run['best_fitness']} in {run['wall_time']:.2f} s")
+
+    results = {'metadata': {'commit': get_commit(), 'date': datetime.now().isoformat(),
+                            'python': platform.python_version(), 'platform': platform.platform(),
+                            'cpu_count': os.cpu_count(), 'arguments': vars(arguments),
+                            'total_time': time.perf_counter() - start},
+               'summary': summarize(runs),
+               'runs': runs}
+    with open(arguments.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f'Results written to {arguments.output}')
+
+
+if __name__ == '__main__':
+    main()
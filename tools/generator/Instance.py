@@ -3,12 +3,16 @@ import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+
 
 class Instance:
 
     def __init__(self, name: str, start: datetime, duration: timedelta):
         """
-        Initializes the problem instance
+        Initializes the problem instance.
+        DTOs, ARs, PAWs and DLOs are kept as columns, mapping each field to an array of values
+
         :param name: the name of the instance
         """
         self.name = name
@@ -16,26 +20,32 @@ class Instance:
         self.end = self.start + duration
         self.time_between_dates = self.end - self.start
         print(f'start {start} \n end: {self.end} \n time between: {self.time_between_dates}')
-        self.dtos = []
-        self.ars = []
+        self.dtos = {}
+        self.ars = {}
         self.constants = {}
-        self.paws = []
-        self.dlos = []
+        self.paws = {}
+        self.dlos = {}
 
     def get_dtos(self):
-        return self.dtos
+        return to_records(self.dtos)
 
     def get_ars(self):
-        return self.ars
+        return to_records(self.ars)
 
     def get_constants(self):
         return self.constants
 
     def get_paws(self):
-        return self.paws
+        return to_records(self.paws)
 
     def get_dlos(self):
-        return self.dlos
+        return to_records(self.dlos)
+
+    def get_columns(self) -> tuple:
+        """ Returns DTOs, ARs, constants, PAWs and DLOs as utils.functions.load_columns does,
+            so that the instance can be solved without being saved """
+        empty = {'id': np.zeros(0, dtype=np.int64), 'start_time': np.zeros(0), 'stop_time': np.zeros(0)}
+        return self.dtos, self.ars, self.constants, self.paws or empty, self.dlos or empty
 
     def save(self):
         """ Saves the instance to a directory named as the instance """
@@ -48,15 +58,34 @@ class Instance:
             json.dump(self.constants, f)
 
         with open(f'{path}/ARs.json', 'w') as f:
-            json.dump(self.ars, f)
+            write_records(f, self.ars)
 
         with open(f'{path}/DTOs.json', 'w') as f:
-            json.dump(self.dtos, f)
+            write_records(f, self.dtos)
 
         with open(f'{path}/PAWs.json', 'w') as f:
-            json.dump(self.paws, f)
+            write_records(f, self.paws)
 
         with open(f'{path}/DLOs.json', 'w') as f:
-            json.dump(self.dlos, f)
+            write_records(f, self.dlos)
+
+        print("Instance generated")
+
+
+def to_records(columns: {str: np.ndarray}, start: int = 0, stop: int = None) -> [dict]:
+    """ Returns the records from start to stop of the given columns as dictionaries """
+    if not columns:
+        return []
+    values = [column[start:stop].tolist() for column in columns.values()]
+    return [dict(zip(columns, record)) for record in zip(*values)]
+
 
-        print("Instance generated")
\ No newline at end of file
+def write_records(file, columns: {str: np.ndarray}, chunk_size: int = 100000):
+    """ Writes the columns to the file as a JSON array of records, converting a chunk of records at a time """
+    length = len(next(iter(columns.values()))) if columns else 0
+    file.write('[')
+    for start in range(0, length, chunk_size):
+        if start > 0:
+            file.write(', ')
+        file.write(json.dumps(to_records(columns, start, start + chunk_size))[1:-1])
+    file.write(']')
@@ -1,20 +1,21 @@
 from datetime import datetime, timedelta
-from random import randint, randrange
 
 import numpy as np
 
-from utils.functions import overlap
 from .Instance import Instance
 
 
 class InstanceBuilder:
 
-    def __init__(self, name: str, start: datetime = datetime.today(), duration: timedelta = timedelta(hours=2)):
+    def __init__(self, name: str, start: datetime = datetime.today(), duration: timedelta = timedelta(hours=2),
+                 seed: int = None):
         """
         Initializes the instance builder
 
         :param name: the name of the instance
         :param start: the start datetime of the instance
+        :param duration: the duration of the planning horizon
+        :param seed: the seed of the random generator, the same seed generates the same instance
         """
         self.start_date = start
         if not isinstance(start, datetime) or not isinstance(duration, timedelta):
@@ -22,6 +23,10 @@ class InstanceBuilder:
         if name is None or not isinstance(name, str):
             raise ValueError("Wrong name parameter, must be a string")
         self.instance = Instance(name, start, duration)
+        self.random = np.random.default_rng(seed)
+        # times are whole seconds from the start of the horizon
+        self.start_time: float = start.timestamp()
+        self.horizon: int = int(duration.total_seconds())
 
     def generate_constants(self, memory_cap: float, downlink_rate: float = None):
         """ Generates the constants of the instance (memory_cap and downlink_rate) """
@@ -31,7 +36,8 @@ class InstanceBuilder:
         return self
 
     def generate_ars_and_dtos(self, ars_length: int, dto_per_ar: int, std_dev: float, max_memory: float,
-                              max_rank: int):
+                              max_rank: int, max_duration: int = 120, num_clusters: int = 0,
+                              cluster_width: float = 600):
         """
         Generates the DTOs of the instance
 
@@ -40,27 +46,31 @@ class InstanceBuilder:
         :param std_dev: index of the standard deviation
         :param max_memory: the maximum memory a DTO can have
         :param max_rank: the maximum priority a DTO can have (AR rank)
+        :param max_duration: the maximum duration in seconds of a DTO, longer DTOs give a denser instance
+        :param num_clusters: number of time windows where the DTOs are concentrated, as the passes of the
+                             satellite over the targets. If zero the DTOs are spread uniformly over the horizon
+        :param cluster_width: the standard deviation in seconds of the start times of the DTOs around each cluster
         """
         mu, sigma = dto_per_ar, std_dev  # mean and standard deviation
-        num_dto_per_ar = np.random.normal(mu, sigma, ars_length)
-
-        print(num_dto_per_ar)
-
-        counter_id: int = 0
-        for i, num_dtos in enumerate(num_dto_per_ar):
-            self.instance.ars.append({"id": i, "rank": randint(0, max_rank)})
-
-            for j in range(int(num_dtos)):
-                random_start_date = self.instance.start + \
-                                    timedelta(seconds=randrange(self.instance.time_between_dates.seconds))
-                random_end_date = random_start_date + timedelta(seconds=randrange(120))
-                self.instance.dtos.append({"id": counter_id, "ar_id": i,
-                                           "start_time": random_start_date.timestamp(),
-                                           "stop_time": random_end_date.timestamp(),
-                                           "memory": randint(5, max_memory)})
-                counter_id += 1
-
-        self.instance.constants['NUM_DTOS'] = len(self.instance.dtos)
+        num_dto_per_ar = np.maximum(np.trunc(self.random.normal(mu, sigma, ars_length)), 0).astype(np.int64)
+        num_dtos = int(num_dto_per_ar.sum())
+
+        self.instance.ars = {'id': np.arange(ars_length), 'rank': self.random.integers(0, max_rank + 1, ars_length)}
+
+        if num_clusters > 0:
+            centers = self.random.uniform(0, self.horizon, num_clusters)
+            offsets = self.random.normal(centers[self.random.integers(0, num_clusters, num_dtos)], cluster_width)
+            offsets = np.clip(np.round(offsets), 0, self.horizon - 1)
+        else:
+            offsets = self.random.integers(0, self.horizon, num_dtos)
+        start_times = self.start_time + offsets.astype(np.float64)
+        self.instance.dtos = {'id': np.arange(num_dtos),
+                              'ar_id': np.repeat(np.arange(ars_length), num_dto_per_ar),
+                              'start_time': start_times,
+                              'stop_time': start_times + self.random.integers(0, max_duration, num_dtos),
+                              'memory': self.random.integers(5, max_memory + 1, num_dtos)}
+
+        self.instance.constants['NUM_DTOS'] = num_dtos
         self.instance.constants['NUM_ARS'] = ars_length
         return self
 
@@ -70,39 +80,32 @@ class InstanceBuilder:
 
         :param length: number of PAWs to generate
         """
-        for i in range(length):
-            random_start_date = self.instance.start + \
-                                timedelta(seconds=randrange(self.instance.time_between_dates.seconds))
-            random_end_date = random_start_date + timedelta(seconds=randrange(100))
-            self.instance.paws.append({"id": i,
-                                       "start_time": random_start_date.timestamp(),
-                                       "stop_time": random_end_date.timestamp()})
+        start_times = self.start_time + self.random.integers(0, self.horizon, length).astype(np.float64)
+        self.instance.paws = {'id': np.arange(length),
+                              'start_time': start_times,
+                              'stop_time': start_times + self.random.integers(0, 100, length)}
         self.instance.constants['NUM_PAWS'] = length
         return self
 
-    def generate_dlos(self, length: int):
+    def generate_dlos(self, length: int, max_duration: int = 100):
         """
-        Generates the DLOs of the instance
+        Generates the DLOs of the instance, which never overlap each other
 
         :param length: number of DLOs to generate
+        :param max_duration: the maximum duration in seconds of a DLO
         """
-        i: int = 0
-        while i < length:
-            random_start_date = self.instance.start + \
-                                timedelta(seconds=randrange(self.instance.time_between_dates.seconds))
-            random_end_date = random_start_date + timedelta(seconds=randrange(100))
-            dlo = {"id": i + 1,
-                   "start_time": random_start_date.timestamp(),
-                   "stop_time": random_end_date.timestamp()}
-            skip = False
-            for j in range(len(self.instance.dlos)):
-                if overlap(dlo, self.instance.dlos[j]):
-                    i -= 1
-                    skip = True
-
-            if not skip:
-                self.instance.dlos.append(dlo)
-            i += 1
+        durations = self.random.integers(0, max_duration, length)
+        # the horizon left after the DLOs and a gap of at least one second after each of them
+        free_time = self.horizon - int(durations.sum()) - length
+        if free_time < 0:
+            raise ValueError("The DLOs do not fit in the duration of the instance")
+        # the free time before each DLO is split at sorted random points, so the DLOs follow each other
+        gaps = np.sort(self.random.integers(0, free_time + 1, length))
+        offsets = gaps + np.concatenate(([0], np.cumsum(durations + 1)[:-1]))
+        start_times = self.start_time + offsets.astype(np.float64)
+        self.instance.dlos = {'id': np.arange(1, length + 1),
+                              'start_time': start_times,
+                              'stop_time': start_times + durations}
 
         self.instance.constants['NUM_DLOS'] = length
         return self
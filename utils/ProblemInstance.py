@@ -0,0 +1,248 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+class ProblemInstance:
+    """ Array-backed representation of a problem instance, shared by the heuristic and the mathematical solutions.
+        DTOs and DLOs are sorted by start time and each of them is referenced by its index in the arrays """
+
+    DTO_FIELDS = ('id', 'ar_id', 'start_time', 'stop_time', 'memory')
+    AR_FIELDS = ('id', 'rank')
+    DLO_FIELDS = ('id', 'start_time', 'stop_time')
+    # maximum number of couples of overlapping DTOs generated at a time while building the conflict index
+    CONFLICT_BLOCK_SIZE = 1 << 22
+
+    def __init__(self, dtos: [dict], ars: [dict], capacity: float,
+                 dlos: [dict] = None, downlink_rate: float = None) -> None:
+        """
+        Compiles the given DTOs, ARs and DLOs into contiguous arrays
+
+        :param dtos: list of dtos
+        :param ars: list of ars, used to attach priority and AR index to each DTO
+        :param capacity: the memory capacity of the satellite
+        :param dlos: list of dlos, None if the problem does not include down-links
+        :param downlink_rate: the downlink rate of the satellite
+        """
+        self.compile(to_columns(dtos, self.DTO_FIELDS), to_columns(ars, self.AR_FIELDS), capacity,
+                     to_columns(dlos or [], self.DLO_FIELDS), downlink_rate)
+
+    @staticmethod
+    def from_columns(dtos: {str: np.ndarray}, ars: {str: np.ndarray}, capacity: float,
+                     dlos: {str: np.ndarray} = None, downlink_rate: float = None) -> 'ProblemInstance':
+        """ Creates the instance from DTOs, ARs and DLOs given as columns, mapping each field to an array
+            with a value for each record, without building a dictionary for each record """
+        instance = ProblemInstance.__new__(ProblemInstance)
+        if dlos is None:
+            dlos = to_columns([], ProblemInstance.DLO_FIELDS)
+        instance.compile(dtos, ars, capacity, dlos, downlink_rate)
+        return instance
+
+    def compile(self, dtos: {str: np.ndarray}, ars: {str: np.ndarray}, capacity: float,
+                dlos: {str: np.ndarray}, downlink_rate: float) -> None:
+        """ Sorts DTOs and DLOs by start time and joins each DTO with its AR """
+        dto_order = np.argsort(dtos['start_time'], kind='stable')
+        dlo_order = np.argsort(dlos['start_time'], kind='stable')
+
+        self.capacity: float = capacity
+        self.downlink_rate: float = downlink_rate
+
+        # ARs
+        self.num_ars: int = len(ars['id'])
+        self.ar_ids = np.asarray(ars['id'])
+        self.ar_ranks = np.asarray(ars['rank'])
+
+        # DTOs
+        self.num_dtos: int = len(dto_order)
+        self.dto_ids = np.asarray(dtos['id'], dtype=np.int64)[dto_order]
+        self.start_times = np.asarray(dtos['start_time'], dtype=np.float64)[dto_order]
+        self.stop_times = np.asarray(dtos['stop_time'], dtype=np.float64)[dto_order]
+        self.memories = np.asarray(dtos['memory'])[dto_order]
+        self.ar_indices = find_positions(self.ar_ids, np.asarray(dtos['ar_id'])[dto_order])
+        self.priorities = self.ar_ranks[self.ar_indices]
+
+        # DLOs
+        self.num_dlos: int = len(dlo_order)
+        self.dlo_ids = np.asarray(dlos['id'], dtype=np.int64)[dlo_order]
+        self.dlo_start_times = np.asarray(dlos['start_time'], dtype=np.float64)[dlo_order]
+        self.dlo_stop_times = np.asarray(dlos['stop_time'], dtype=np.float64)[dlo_order]
+        if downlink_rate is not None:
+            self.dlo_capacities = downlink_rate * (self.dlo_stop_times - self.dlo_start_times)
+        else:
+            self.dlo_capacities = np.zeros(self.num_dlos)
+
+        # index of the first DLO that starts after each DTO, which is the first DLO able to download it.
+        # DTOs between two consecutive DLOs share the same index, that identifies their memory segment
+        self.dto_segments = np.searchsorted(self.dlo_start_times, self.stop_times, side='right')
+
+        # the instance is shared by all the solutions, so its arrays must never be modified
+        for array in vars(self).values():
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+    def has_dlos(self) -> bool:
+        """ Returns True if the problem includes down-links """
+        return self.num_dlos > 0
+
+    def overlap(self, dto1: int, dto2: int) -> bool:
+        """ Returns True if the DTOs at the given indexes overlap, False otherwise """
+        return self.start_times[dto1] <= self.stop_times[dto2] and self.stop_times[dto1] >= self.start_times[dto2]
+
+    def build_conflict_index(self) -> None:
+        """ Builds, once for the instance, the index of the DTOs overlapping each DTO as a CSR adjacency:
+            the DTOs overlapping the DTO i are conflicts[conflict_pointers[i]:conflict_pointers[i + 1]] in index order.
+            The DLOs able to download the DTO i need no index, they are the ones from dto_segments[i] on.
+            The couples of overlapping DTOs are generated in blocks, so that only the index grows with their number """
+        if hasattr(self, 'conflicts'):
+            return
+        index_type = np.int32 if self.num_dtos < 2 ** 31 else np.int64
+        # the DTOs overlapping the DTO i and starting after it are the ones from i + 1 to ends[i] - 1,
+        # so the DTO i is overlapped by the DTOs j starting before it with j < i < ends[j]
+        ends = np.searchsorted(self.start_times, self.stop_times, side='right')
+        later_counts = ends - np.arange(self.num_dtos) - 1
+        earlier_counts = np.cumsum(np.bincount(np.arange(1, self.num_dtos + 1), minlength=self.num_dtos + 1) -
+                                   np.bincount(ends, minlength=self.num_dtos + 1))[:-1]
+
+        pointers = np.zeros(self.num_dtos + 1, dtype=np.int64)
+        np.cumsum(earlier_counts + later_counts, out=pointers[1:])
+        conflicts = np.empty(pointers[-1], dtype=index_type)
+        # the row of each DTO holds first the DTOs starting before it, then the ones starting after it.
+        # The later part of each row is filled by its own block, the earlier part by the blocks of the DTOs
+        # starting before it, which come in index order
+        later_positions = pointers[:-1] + earlier_counts
+        earlier_positions = pointers[:-1].copy()
+        cumulative_counts = np.cumsum(later_counts)
+        first: int = 0
+        while first < self.num_dtos:
+            # the block ends when it holds CONFLICT_BLOCK_SIZE couples, or after a single DTO with more of them
+            block_start = cumulative_counts[first] - later_counts[first]
+            last = max(int(np.searchsorted(cumulative_counts, block_start + self.CONFLICT_BLOCK_SIZE, side='right')),
+                       first + 1)
+            counts = later_counts[first:last].astype(index_type)
+            firsts = np.repeat(np.arange(first, last, dtype=index_type), counts)
+            offsets = np.arange(len(firsts), dtype=index_type) - np.repeat(np.cumsum(counts) - counts, counts)
+            seconds = firsts + 1 + offsets
+            conflicts[later_positions[firsts] + offsets] = seconds
+            del offsets
+
+            order = np.argsort(seconds, kind='stable')
+            seconds = seconds[order]
+            firsts = firsts[order]
+            del order
+            group_starts = np.searchsorted(seconds, seconds, side='left').astype(index_type)
+            ranks = np.arange(len(seconds), dtype=index_type) - group_starts
+            del group_starts
+            conflicts[earlier_positions[seconds] + ranks] = firsts
+            del ranks, firsts
+            rows, row_counts = np.unique(seconds, return_counts=True)
+            earlier_positions[rows] += row_counts
+            del seconds
+            first = last
+
+        self.conflict_pointers = pointers
+        self.conflicts = conflicts
+        self.conflict_pointers.flags.writeable = False
+        self.conflicts.flags.writeable = False
+
+    def get_conflicts(self, dto: int) -> np.ndarray:
+        """ Returns the DTOs overlapping the given one """
+        self.build_conflict_index()
+        return self.conflicts[self.conflict_pointers[dto]:self.conflict_pointers[dto + 1]]
+
+    def find_conflicting(self, dtos: [int]) -> np.ndarray:
+        """ Returns a mask of the DTOs overlapping at least one of the given DTOs """
+        self.build_conflict_index()
+        dtos = np.asarray(dtos, dtype=np.int64)
+        starts = self.conflict_pointers[dtos]
+        counts = self.conflict_pointers[dtos + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        conflicting = np.zeros(self.num_dtos, dtype=bool)
+        conflicting[self.conflicts[positions]] = True
+        return conflicting
+
+    def get_overlapping_pairs(self) -> (np.ndarray, np.ndarray):
+        """ Returns the indexes of the first and of the second DTO of each couple of overlapping DTOs,
+            the first one starting earlier """
+        self.build_conflict_index()
+        firsts = np.repeat(np.arange(self.num_dtos), np.diff(self.conflict_pointers))
+        later = self.conflicts > firsts
+        return firsts[later], self.conflicts[later].astype(np.int64)
+
+    def with_rounded_memories(self) -> 'ProblemInstance':
+        """ Returns a copy of the instance with the memory of each DTO rounded to the nearest integer, which shares
+            all the other arrays. Returns the instance itself if the memories are already integers """
+        if np.issubdtype(self.memories.dtype, np.integer):
+            return self
+        instance = ProblemInstance.__new__(ProblemInstance)
+        vars(instance).update(vars(self))
+        instance.memories = np.round(self.memories).astype(np.int64)
+        instance.memories.flags.writeable = False
+        return instance
+
+    def get_dto(self, index: int) -> dict:
+        """ Returns the DTO at the given index as a dictionary """
+        return {'id': int(self.dto_ids[index]),
+                'ar_id': self.ar_ids[self.ar_indices[index]].item(),
+                'start_time': float(self.start_times[index]),
+                'stop_time': float(self.stop_times[index]),
+                'memory': self.memories[index].item(),
+                'priority': self.priorities[index].item(),
+                'ar_index': int(self.ar_indices[index])}
+
+    def get_dlo(self, index: int) -> dict:
+        """ Returns the DLO at the given index as a dictionary """
+        return {'id': int(self.dlo_ids[index]),
+                'start_time': float(self.dlo_start_times[index]),
+                'stop_time': float(self.dlo_stop_times[index])}
+
+    def to_shared_memory(self) -> (dict, [SharedMemory]):
+        """ Copies the arrays of the instance into shared memory blocks.
+            Returns the description needed to attach to the instance from other processes and the blocks,
+            which must be closed and unlinked by the caller when they are no longer needed """
+        description = {'attributes': {}, 'arrays': {}}
+        blocks: [SharedMemory] = []
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                block = SharedMemory(create=True, size=max(value.nbytes, 1))
+                np.ndarray(value.shape, value.dtype, buffer=block.buf)[...] = value
+                description['arrays'][name] = (block.name, value.shape, value.dtype.str)
+                blocks.append(block)
+            else:
+                description['attributes'][name] = value
+        return description, blocks
+
+    @staticmethod
+    def from_shared_memory(description: dict) -> ('ProblemInstance', [SharedMemory]):
+        """ Attaches to an instance copied into shared memory by another process, without copying its arrays.
+            Returns the instance and the attached blocks, which must be kept open while the instance is used """
+        instance = ProblemInstance.__new__(ProblemInstance)
+        blocks: [SharedMemory] = []
+        for name, value in description['attributes'].items():
+            setattr(instance, name, value)
+        for name, (block_name, shape, dtype) in description['arrays'].items():
+            block = SharedMemory(name=block_name)
+            array = np.ndarray(shape, dtype, buffer=block.buf)
+            array.flags.writeable = False
+            setattr(instance, name, array)
+            blocks.append(block)
+        return instance, blocks
+
+
+def to_columns(records: [dict], fields: (str,)) -> {str: np.ndarray}:
+    """ Returns the given fields of the records as columns, mapping each field to an array of values """
+    return {field: np.array([record[field] for record in records]) for field in fields}
+
+
+def find_positions(ids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """ Returns the position in ids of each key, with a binary search over the sorted ids.
+        Raises KeyError if a key is not found """
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if len(ids) == 0:
+        raise KeyError(keys[0].item())
+    sorter = np.argsort(ids, kind='stable')
+    positions = sorter[np.minimum(np.searchsorted(ids, keys, sorter=sorter), len(ids) - 1)]
+    missing = ids[positions] != keys
+    if missing.any():
+        raise KeyError(keys[missing][0].item())
+    return positions.astype(np.int64)
@@ -1 +1,2 @@
 from .Constraint import Constraint
+from .ProblemInstance import ProblemInstance
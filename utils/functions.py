@@ -1,90 +1,265 @@
 import json
 import os
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+
+from .ProblemInstance import ProblemInstance, to_columns
+
+
+TABLES = {'DTOs': ProblemInstance.DTO_FIELDS, 'ARs': ProblemInstance.AR_FIELDS,
+          'PAWs': ProblemInstance.DLO_FIELDS, 'DLOs': ProblemInstance.DLO_FIELDS}
+SOURCES = ('DTOs', 'ARs', 'constants', 'PAWs', 'DLOs')
+CACHE_FILE = 'instance.npz'
+
+
+def get_instance_directory(instance: str) -> str:
+    """ Returns the directory of the JSON files of the instance """
+    return os.path.join(os.path.dirname(__file__), '..', 'instances', instance)
 
 
 def load_instance(instance: str) -> tuple:
     """ Loads the instance from the file. Returns a tuple containing DTOs, ARs, constants, PAWs, DLOs """
-    # read JSON files
-    root_dir = os.path.dirname(__file__)
-    print(root_dir)
-    dtos_file = open(f'{root_dir}/../instances/{instance}/DTOs.json')
-    ars_file = open(f'{root_dir}/../instances/{instance}/ARs.json')
-    constants_file = open(f'{root_dir}/../instances/{instance}/constants.json')
-    paws_file = open(f'{root_dir}/../instances/{instance}/PAWs.json')
-    dlos_file = open(f'{root_dir}/../instances/{instance}/DLOs.json')
-
-    # loads JSON, the result is a dictionary
-    dtos = json.loads(dtos_file.read())
-    ars = json.loads(ars_file.read())
-    constants = json.loads(constants_file.read())
-    paws = json.loads(paws_file.read())
-    dlos = json.loads(dlos_file.read())
-    return dtos, ars, constants, paws, dlos
-
-
-def overlap(event1, event2):
-    """ Returns True if events overlap, False otherwise """
-    return event1['start_time'] <= event2['stop_time'] and event1['stop_time'] >= event2['start_time']
-
-
-def add_dummy_dlo(dtos, dlos):
+    directory = get_instance_directory(instance)
+    loaded = []
+    for source in SOURCES:
+        # loads JSON, the result is a dictionary
+        with open(os.path.join(directory, f'{source}.json')) as file:
+            loaded.append(json.load(file))
+    return tuple(loaded)
+
+
+def load_columns(instance: str, cache: bool = True) -> tuple:
+    """
+    Loads the instance with DTOs, ARs, PAWs and DLOs as columns, mapping each field to an array of values.
+    The columns are saved in a binary file next to the JSON files the first time they are loaded,
+    and read from it until one of the JSON files is modified
+
+    :param instance: the name of the instance
+    :param cache: if False the JSON files are always parsed and the binary file is not written
+    :return: a tuple containing DTOs, ARs, constants, PAWs, DLOs
+    """
+    directory = get_instance_directory(instance)
+    cache_path = os.path.join(directory, CACHE_FILE)
+    # the modification time and the size of the JSON files tell if the binary file is stale
+    signature = np.array([[os.stat(os.path.join(directory, f'{source}.json')).st_mtime_ns,
+                           os.stat(os.path.join(directory, f'{source}.json')).st_size] for source in SOURCES])
+
+    if cache and os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as arrays:
+            if np.array_equal(arrays['signature'], signature):
+                tables = {table: {field: arrays[f'{table}.{field}'] for field in fields}
+                          for table, fields in TABLES.items()}
+                constants = json.loads(arrays['constants'].item())
+                return tables['DTOs'], tables['ARs'], constants, tables['PAWs'], tables['DLOs']
+
+    dtos, ars, constants, paws, dlos = load_instance(instance)
+    tables = {table: to_columns(records, TABLES[table])
+              for table, records in zip(('DTOs', 'ARs', 'PAWs', 'DLOs'), (dtos, ars, paws, dlos))}
+    if cache:
+        arrays = {f'{table}.{field}': column for table, columns in tables.items() for field, column in columns.items()}
+        try:
+            # the file is written under a temporary name, so that a concurrent load never reads it incomplete
+            temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+            with open(temporary_path, 'wb') as file:
+                np.savez(file, signature=signature, constants=np.array(json.dumps(constants)), **arrays)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            # the instance can still be used when its directory is read-only
+            pass
+    return tables['DTOs'], tables['ARs'], constants, tables['PAWs'], tables['DLOs']
+
+
+def iterate_json_array(path: str, chunk_size: int = 1 << 20):
+    """
+    Iterates the objects of a JSON file containing an array of objects, reading it in chunks,
+    so that the whole text is never kept in memory
+
+    :param path: the path of the JSON file
+    :param chunk_size: the number of characters read at a time
+    :return: a generator of the objects, as dictionaries
+    """
+    decoder = json.JSONDecoder()
+    with open(path) as file:
+        buffer = ''
+        position = 0
+        expected = '['
+        while True:
+            # skip the white spaces, reading the next chunk when the buffer ends
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position == len(buffer):
+                buffer = file.read(chunk_size)
+                position = 0
+                if not buffer:
+                    raise ValueError(f'Unexpected end of file {path}')
+                continue
+
+            character = buffer[position]
+            if expected == '[':
+                if character != '[':
+                    raise ValueError(f'The file {path} does not contain an array')
+                position += 1
+                expected = 'object'
+            elif character == ']':
+                return
+            elif expected == ',':
+                if character != ',':
+                    raise ValueError(f'Expected a comma at character {position} of the chunk of {path}')
+                position += 1
+                expected = 'object'
+            else:
+                try:
+                    record, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # the object continues in the next chunk, an object is complete only when its braces are closed
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        raise
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+                yield record
+                expected = ','
+
+
+def stream_instance(instance: str, downlinks: bool, chunk_size: int = 1 << 20) -> ProblemInstance:
+    """
+    Loads an instance ready to be solved reading the DTOs one at a time, dropping the ones overlapping PAWs
+    and DLOs while they are read, so that the memory needed grows with the DTOs kept and not with the file size
+
+    :param instance: the name of the instance
+    :param downlinks: True for the complete problem, False for the partial problem without DLOs
+    :param chunk_size: the number of characters of the DTOs file read at a time
+    :return: the problem instance
+    """
+    directory = get_instance_directory(instance)
+    tables = {}
+    for source in ('ARs', 'constants', 'PAWs', 'DLOs'):
+        with open(os.path.join(directory, f'{source}.json')) as file:
+            tables[source] = json.load(file)
+    ars = to_columns(tables['ARs'], ProblemInstance.AR_FIELDS)
+    ar_positions = {ar_id: index for index, ar_id in enumerate(ars['id'].tolist())}
+    dlos = to_columns(tables['DLOs'], ProblemInstance.DLO_FIELDS) if downlinks else None
+
+    # events sorted by start time, with the latest stop of the events started until each one
+    events = tables['PAWs'] + (tables['DLOs'] if downlinks else [])
+    events.sort(key=lambda event_: event_['start_time'])
+    event_start_times = [event['start_time'] for event in events]
+    latest_stops = np.maximum.accumulate([event['stop_time'] for event in events]).tolist() if events else []
+
+    ids = array('q')
+    ar_indices = array('q')
+    start_times = array('d')
+    stop_times = array('d')
+    # memories are stored as integers until a fractional one is read
+    memories = array('q')
+    for dto in iterate_json_array(os.path.join(directory, 'DTOs.json'), chunk_size):
+        last_event = bisect_right(event_start_times, dto['stop_time']) - 1
+        if last_event >= 0 and latest_stops[last_event] >= dto['start_time']:
+            continue
+        ids.append(dto['id'])
+        ar_indices.append(ar_positions[dto['ar_id']])
+        start_times.append(dto['start_time'])
+        stop_times.append(dto['stop_time'])
+        try:
+            memories.append(dto['memory'])
+        except TypeError:
+            memories = array('d', memories)
+            memories.append(dto['memory'])
+
+    dtos = {'id': np.frombuffer(ids, dtype=np.int64),
+            'ar_id': ars['id'][np.frombuffer(ar_indices, dtype=np.int64)],
+            'start_time': np.frombuffer(start_times, dtype=np.float64),
+            'stop_time': np.frombuffer(stop_times, dtype=np.float64),
+            'memory': np.frombuffer(memories, dtype=np.int64 if memories.typecode == 'q' else np.float64)}
+    return build_instance(dtos, ars, tables['constants'], dlos)
+
+
+def overlaps_events(start_times: np.ndarray, stop_times: np.ndarray,
+                    event_start_times: np.ndarray, event_stop_times: np.ndarray) -> np.ndarray:
+    """
+    Finds the intervals overlapping at least one of the events, merging the events sorted by start time
+
+    :param start_times: start times of the intervals
+    :param stop_times: stop times of the intervals
+    :param event_start_times: start times of the events, in any order
+    :param event_stop_times: stop times of the events
+    :return: True for each interval overlapping an event, False otherwise
+    """
+    if len(event_start_times) == 0:
+        return np.zeros(len(start_times), dtype=bool)
+    order = np.argsort(event_start_times, kind='stable')
+    event_start_times = event_start_times[order]
+    # the latest stop among the events started until each one, an interval overlaps an event
+    # if and only if it starts before the latest stop of the events started before its stop
+    latest_stops = np.maximum.accumulate(event_stop_times[order])
+    last_events = np.searchsorted(event_start_times, stop_times, side='right') - 1
+    return (last_events >= 0) & (latest_stops[np.maximum(last_events, 0)] >= start_times)
+
+
+def prepare_instance(dtos: {str: np.ndarray}, ars: {str: np.ndarray}, constants: dict, paws: {str: np.ndarray},
+                     dlos: {str: np.ndarray} = None) -> ProblemInstance:
+    """
+    Prepares an instance ready to be solved: gets rid of the DTOs overlapping PAWs and DLOs,
+    adds the dummy DLO at the end of the plan and compiles everything into a ProblemInstance
+
+    :param dtos: the columns of the dtos, as returned by load_columns
+    :param ars: the columns of the ars
+    :param constants: the constants of the instance
+    :param paws: the columns of the paws
+    :param dlos: the columns of the dlos, None for the partial problem
+    :return: the problem instance
+    """
+    events = [paws] if dlos is None else [paws, dlos]
+    overlapping = overlaps_events(dtos['start_time'], dtos['stop_time'],
+                                  np.concatenate([event['start_time'] for event in events]),
+                                  np.concatenate([event['stop_time'] for event in events]))
+    dtos = {field: column[~overlapping] for field, column in dtos.items()}
+    return build_instance(dtos, ars, constants, dlos)
+
+
+def build_instance(dtos: {str: np.ndarray}, ars: {str: np.ndarray}, constants: dict,
+                   dlos: {str: np.ndarray} = None) -> ProblemInstance:
+    """ Compiles the columns of DTOs already filtered into a ProblemInstance,
+        adding the dummy DLO at the end of the plan for the complete problem """
+    if dlos is None:
+        return ProblemInstance.from_columns(dtos, ars, constants['MEMORY_CAP'])
+    # add the dummy DLO, which downloads the DTOs still in memory at the end of the plan
+    last_dlo = np.argsort(dlos['start_time'], kind='stable')[-1]
+    dummy_time = max(dtos['stop_time'].max(initial=0), dlos['stop_time'].max()) + 1000
+    dlos = {'id': np.append(dlos['id'], dlos['id'][last_dlo]),
+            'start_time': np.append(dlos['start_time'], dummy_time),
+            'stop_time': np.append(dlos['stop_time'], dummy_time)}
+    return ProblemInstance.from_columns(dtos, ars, constants['MEMORY_CAP'], dlos, constants['DOWNLINK_RATE'])
+
+
+def find_maximal_cliques(start_times: np.ndarray, stop_times: np.ndarray) -> (np.ndarray, np.ndarray):
     """
-    Adds the dummy variable for some next constraints
+    Finds the maximal cliques of overlapping events with a sweep, every set of events overlapping each other
+    belongs to one of them. Cliques made of a single event are discarded
 
-    :param dtos: list of dtos
-    :param dlos: list of dlos
-    :return: dlos with dummy dlo added
+    :param start_times: start times of the events, sorted in ascending order
+    :param stop_times: stop times of the events
+    :return: the events of all the cliques one after the other, and the index where each clique starts
+             in that array followed by its length (as the index pointers of a CSR matrix)
     """
-    ordered_dtos = sorted(dtos, key=lambda dto_: dto_['start_time'])
-    ordered_dlos = sorted(dlos, key=lambda dlo_: dlo_['start_time'])
-    stop_time = max(ordered_dtos[-1]['stop_time'], ordered_dlos[-1]['stop_time'])
-    dummy_dlo = ordered_dlos[-1].copy()
-    dummy_dlo['start_time'] = stop_time + 1000
-    dummy_dlo['stop_time'] = dummy_dlo['start_time']
-    ordered_dlos.append(dummy_dlo)
-    return ordered_dlos
-
-
-def binary_search(dto, plan) -> int:
-    """ Iterative implementation of binary search.
-        Returns index of dto in the given plan, -1 if not found """
-    low = 0
-    high = len(plan) - 1
-    while high >= low:
-        mid = (high + low) // 2
-
-        # If element is present at the middle itself
-        if plan[mid] == dto:
-            return mid
-
-        # If element is smaller than mid, then it can only be present in left sub-array
-        if dto['start_time'] > plan[mid]['start_time']:
-            low = mid + 1
-
-        # Else the element can only be present in right sub-array
-        else:
-            high = mid - 1
-
-    # Element is not present in the array
-    return -1
-
-
-def find_insertion_point(dto, plan) -> int:
-    """ Finds the insertion index for a dto in the plan """
-    if len(plan) == 0 or dto['start_time'] <= plan[0]['start_time']:
-        return 0
-    if dto['start_time'] >= plan[-1]['start_time']:
-        return len(plan)
-
-    low = 0
-    high = len(plan) - 1
-    while high >= low:
-        mid = low + (high - low) // 2
-
-        if plan[mid]['start_time'] <= dto['start_time'] <= plan[mid + 1]['start_time']:
-            return mid + 1
-
-        if dto['start_time'] > plan[mid]['start_time']:
-            low = mid + 1
-        else:
-            high = mid - 1
+    members: [int] = []
+    pointers: [int] = [0]
+    active = set()
+    started: bool = False
+    i: int = 0
+    for event in np.argsort(stop_times, kind='stable').tolist():
+        # events starting at the same time another one stops overlap with it, so starts are processed first
+        while i < len(start_times) and start_times[i] <= stop_times[event]:
+            active.add(i)
+            started = True
+            i += 1
+        # the active events form a maximal clique only if an event started after the last stop
+        if started and len(active) > 1:
+            members.extend(sorted(active))
+            pointers.append(len(members))
+        started = False
+        active.remove(event)
+    return np.array(members, dtype=np.int64), np.array(pointers, dtype=np.int64)